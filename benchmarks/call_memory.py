@@ -0,0 +1,63 @@
+"""
+Reports peak RSS of recording call heavy scripts, both when trace is
+returned as a whole and when its steps are streamed and dropped right away.
+Each case is recorded in a separate process, so peaks don't add up.
+
+Usage: python benchmarks/call_memory.py [FIB_N]
+"""
+import resource
+import subprocess
+import sys
+import time
+
+from pytrace.tracer import ControlledTraceRecorder, PersistentTraceRecorder
+
+
+SCRIPT = """
+def fib(n):
+    scratch = [n] * 50
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+
+result = fib(%d)
+"""
+
+RECORDERS = {
+    'controlled': ControlledTraceRecorder,
+    'persistent': PersistentTraceRecorder
+}
+
+
+def record(recorder_name, mode, n):
+    recorder = RECORDERS[recorder_name](max_steps=10 ** 7)
+    script = SCRIPT % n
+
+    start = time.time()
+    if mode == 'stream':
+        steps = sum(1 for _ in recorder.iter_run(script))
+    else:
+        steps = len(recorder.run(script)['steps'])
+
+    elapsed = time.time() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    print("%-12s %-8s %10d steps %8.2fs %10.1f MB peak RSS" % (
+        recorder_name, mode, steps, elapsed, peak
+    ))
+
+
+def main(n=18):
+    print("fib(%d)" % n)
+    for recorder_name in sorted(RECORDERS):
+        for mode in ('run', 'stream'):
+            subprocess.check_call([
+                sys.executable, __file__, '--record', recorder_name, mode,
+                str(n)
+            ])
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--record']:
+        record(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        main(*[int(e) for e in sys.argv[1:]])
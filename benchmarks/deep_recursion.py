@@ -0,0 +1,45 @@
+"""
+Compares recording time per step of recursive functions at various depths.
+Locals of suspended frames don't change, so time per step shouldn't grow
+much along with depth.
+
+Usage: python benchmarks/deep_recursion.py [STEPS]
+"""
+import sys
+import time
+
+from pytrace.tracer import ControlledTraceRecorder, PersistentTraceRecorder
+
+
+SCRIPT = """
+def descend(depth, items):
+    if depth == 0:
+        total = 0
+        for i in range(%d):
+            total += i
+        return total
+    return descend(depth - 1, items)
+
+descend(%d, [1, 2, 3])
+"""
+
+
+def main(steps=2000):
+    print("%d loops at bottom of recursion" % steps)
+
+    for recorder_class in (ControlledTraceRecorder, PersistentTraceRecorder):
+        for depth in (1, 10, 50, 200):
+            recorder = recorder_class(max_steps=10 ** 6)
+            start = time.time()
+            trace = recorder.run(SCRIPT % (steps, depth))
+            record_time = time.time() - start
+
+            count = len(trace['steps'])
+            print("%-24s depth %4d %8d steps %8.3fs %8.1fus/step" % (
+                recorder_class.__name__, depth, count, record_time,
+                record_time / count * 10 ** 6
+            ))
+
+
+if __name__ == '__main__':
+    main(*[int(e) for e in sys.argv[1:]])
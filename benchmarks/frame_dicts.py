@@ -0,0 +1,66 @@
+"""
+Counts dictionaries of filtered frame variables (built by
+`filter_vars_dict`) per recorded step, along with time per step.
+
+Usage: python benchmarks/frame_dicts.py [CALLS]
+"""
+import importlib
+import sys
+import time
+
+from pytrace.tracer import ControlledTraceRecorder
+
+
+SCRIPT = """
+def inner(x, factor):
+    scaled = x * factor
+    return scaled
+
+def outer(x):
+    first = inner(x, 2)
+    second = inner(first, 3)
+    return first + second
+
+total = 0
+for i in range(%d):
+    total += outer(i)
+"""
+
+# Modules calling `filter_vars_dict` through their own reference
+MODULES = ('pytrace.core.frames', 'pytrace.tracer.utils')
+
+
+def count_calls(counter):
+    for name in MODULES:
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            continue
+
+        function = getattr(module, 'filter_vars_dict', None)
+        if function is None:
+            continue
+
+        def counting(vars_dict, function=function):
+            counter[0] += 1
+            return function(vars_dict)
+
+        module.filter_vars_dict = counting
+
+
+def main(calls=300):
+    counter = [0]
+    count_calls(counter)
+
+    recorder = ControlledTraceRecorder(max_steps=10 ** 6)
+    start = time.time()
+    steps = len(recorder.run(SCRIPT % calls)['steps'])
+    elapsed = time.time() - start
+
+    print("%d steps %8.3fs %8.1fus/step %8.2f dicts/step" % (
+        steps, elapsed, elapsed / steps * 10 ** 6, counter[0] / float(steps)
+    ))
+
+
+if __name__ == '__main__':
+    main(*[int(e) for e in sys.argv[1:]])
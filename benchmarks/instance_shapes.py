@@ -0,0 +1,47 @@
+"""
+Compares JSON size and encoding time of traces holding many instances of
+the same class, recorded with and without shape encoding of instances.
+
+Usage: python benchmarks/instance_shapes.py [NODES] [STEPS]
+"""
+import sys
+import time
+
+from pytrace.json import dumps
+from pytrace.tracer import ControlledTraceRecorder, ShapedTraceRecorder
+
+
+SCRIPT = """
+class Node(object):
+    def __init__(self, value, left=None, right=None):
+        self.value = value
+        self.left = left
+        self.right = right
+
+nodes = [Node(i) for i in range(%d)]
+total = 0
+for i in range(%d):
+    total += nodes[i %% len(nodes)].value
+"""
+
+
+def main(nodes=300, steps=100):
+    script = SCRIPT % (nodes, steps)
+    print("%d nodes, %d loops" % (nodes, steps))
+
+    for recorder_class in (ControlledTraceRecorder, ShapedTraceRecorder):
+        start = time.time()
+        trace = recorder_class(max_steps=10 ** 6).run(script)
+        record_time = time.time() - start
+
+        start = time.time()
+        encoded = dumps(trace)
+        encode_time = time.time() - start
+
+        print("%-24s %12d bytes %8.3fs record %8.3fs dumps" % (
+            recorder_class.__name__, len(encoded), record_time, encode_time
+        ))
+
+
+if __name__ == '__main__':
+    main(*[int(e) for e in sys.argv[1:]])
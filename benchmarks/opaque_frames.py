@@ -0,0 +1,54 @@
+"""
+Measures debugger overhead for a script spending most of its time inside
+a safe module (`random.shuffle`), whose frames are not traced at all,
+compared to native execution and to tracing every frame with plain
+`bdb.Bdb`.
+
+Usage: python benchmarks/opaque_frames.py [LIST_SIZE]
+"""
+import sys
+import time
+from bdb import Bdb
+
+from pytrace.core.debugger import get_debugger_class, is_monitoring_available
+from pytrace.core.sandbox import Sandbox
+
+
+SCRIPT = """
+import random
+items = list(range(%d))
+random.shuffle(items)
+"""
+
+
+def timed(func):
+    started = time.time()
+    func()
+    return time.time() - started
+
+
+def noop(*args, **kwargs):
+    pass
+
+
+def main(size=200000):
+    script = SCRIPT % size
+
+    native = timed(lambda: Sandbox().run(script))
+    print("%-12s %8.3fs" % ("native", native))
+
+    full = timed(lambda: Sandbox().run(script, runner=Bdb().run))
+    print("%-12s %8.3fs  x%.1f" % ("plain bdb", full, full / native))
+
+    backends = ['bdb']
+    if is_monitoring_available():
+        backends.append('monitoring')
+
+    for backend in backends:
+        debugger = get_debugger_class(backend)(noop)
+        elapsed = timed(lambda: debugger.run(script))
+        print("%-12s %8.3fs  x%.1f" % (backend, elapsed, elapsed / native))
+
+
+if __name__ == '__main__':
+    main(*[int(e) for e in sys.argv[1:]])
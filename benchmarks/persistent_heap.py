@@ -0,0 +1,38 @@
+"""
+Compares recording time and size of a script mutating a single object of
+a large heap, using `DeltaTraceRecorder` which encodes the whole heap on
+every step and `PersistentTraceRecorder` which only encodes objects that
+changed. Both record same delta encoded steps.
+
+Usage: python benchmarks/persistent_heap.py [HEAP_SIZE] [STEPS]
+"""
+import sys
+import time
+
+from pytrace.json import dumps
+from pytrace.tracer import DeltaTraceRecorder, PersistentTraceRecorder
+
+
+SCRIPT = """
+items = list(map(list, zip(range(%d), range(1, 10 ** 6))))
+for i in range(%d):
+    items[0].append(i)
+"""
+
+
+def main(size=2000, steps=200):
+    script = SCRIPT % (size, steps)
+
+    for recorder_class in (DeltaTraceRecorder, PersistentTraceRecorder):
+        recorder = recorder_class(max_steps=steps * 3)
+        started = time.time()
+        trace = recorder.run(script)
+        elapsed = time.time() - started
+
+        print("%-24s %8.3fs %10d bytes" % (
+            recorder_class.__name__, elapsed, len(dumps(trace))
+        ))
+
+
+if __name__ == '__main__':
+    main(*[int(e) for e in sys.argv[1:]])
@@ -0,0 +1,72 @@
+"""
+Measures time taken by `ControlledTraceRecorder().run` to record a script
+building a linked list, along with memory held by recorded trace and
+number of allocated blocks it's made of. Run it against trees before and
+after a change to compare them.
+
+Usage: python benchmarks/step_records.py [LOOPS] [REPEATS]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from pytrace.tracer import ControlledTraceRecorder
+
+
+SCRIPT = """
+class Node(object):
+    def __init__(self, value, next=None):
+        self.value = value
+        self.next = next
+
+def push(head, value):
+    return Node(value, head)
+
+head = None
+for i in range(%d):
+    head = push(head, i)
+"""
+
+
+def record(script):
+    return ControlledTraceRecorder().run(script)
+
+
+def measure_memory(script):
+    "Returns size and blocks count of memory held by trace of `script`"
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    trace = record(script)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, 'filename')
+    size = sum(e.size_diff for e in stats)
+    count = sum(e.count_diff for e in stats)
+    return trace, size, count
+
+
+def main(loops=30, repeats=10):
+    script = SCRIPT % loops
+    record(script)  # Warm up compile and code info caches
+
+    timings = []
+    for _ in range(repeats):
+        started = time.time()
+        record(script)
+        timings.append(time.time() - started)
+
+    trace, size, count = measure_memory(script)
+    steps = len(trace['steps'])
+    print("%d steps" % steps)
+    print("run      %8.4fs best %8.4fs mean" % (
+        min(timings), sum(timings) / len(timings)))
+    print("memory   %10d bytes %8d blocks %8.1f bytes/step" % (
+        size, count, float(size) / steps))
+
+
+if __name__ == '__main__':
+    main(*[int(e) for e in sys.argv[1:]])
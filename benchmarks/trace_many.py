@@ -0,0 +1,49 @@
+"""
+Compares throughput of tracing a batch of scripts sequentially using
+`pytrace.trace` against `pytrace.trace_many` with different pool sizes.
+
+Usage: python benchmarks/trace_many.py [SCRIPTS_COUNT]
+"""
+import sys
+import time
+import multiprocessing
+
+import pytrace
+
+
+SCRIPT = """
+items = []
+for i in range(%d):
+    items.append(i * i)
+    total = sum(items)
+
+print (total)
+"""
+
+
+def timed(func):
+    started = time.time()
+    func()
+    return time.time() - started
+
+
+def main(count=200):
+    scripts = [SCRIPT % (20 + i % 10) for i in range(count)]
+
+    sequential = timed(lambda: [pytrace.trace(e) for e in scripts])
+    print("%-14s %8.2fs %10.1f scripts/s" % (
+        "sequential", sequential, count / sequential))
+
+    processes = 1
+    while processes <= multiprocessing.cpu_count():
+        elapsed = timed(lambda: list(
+            pytrace.trace_many(scripts, processes=processes, chunksize=4)
+        ))
+        print("%-14s %8.2fs %10.1f scripts/s  x%.2f" % (
+            "%d process(es)" % processes, elapsed, count / elapsed,
+            sequential / elapsed))
+        processes *= 2
+
+
+if __name__ == '__main__':
+    main(*[int(e) for e in sys.argv[1:]])
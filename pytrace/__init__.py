@@ -17,9 +17,32 @@ def setup():
 setup()
 
 from pytrace.tracer import ControlledTraceRecorder, AbstractTraceRecorder
+from pytrace.batch import trace_many  # NOQA
+from pytrace.cache import TraceCache  # NOQA
+from pytrace.session import TraceSession  # NOQA
 
 
-def trace(script, input_queue=None, tracer_class=ControlledTraceRecorder, **options):
+def trace(script, input_queue=None, tracer_class=ControlledTraceRecorder,
+          cache=None, **options):
+    """
+    Traces `script` and returns recorded trace. If a `pytrace.cache.TraceCache`
+    is specified as `cache`, the same script traced with same inputs, options
+    and settings is only executed once.
+    """
     assert issubclass(tracer_class, AbstractTraceRecorder)
+    if cache is not None:
+        return cache.trace(script, input_queue, tracer_class, **options)
+
     tracer = tracer_class(**options)
     return tracer.run(script, input_queue=input_queue)
+
+
+def iter_trace(script, input_queue=None, tracer_class=ControlledTraceRecorder,
+               **options):
+    """
+    Same as `trace` but returns an iterable `TraceStream` which yields
+    every step as soon as it is recorded
+    """
+    assert issubclass(tracer_class, AbstractTraceRecorder)
+    tracer = tracer_class(**options)
+    return tracer.iter_run(script, input_queue=input_queue)
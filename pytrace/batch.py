@@ -0,0 +1,96 @@
+"""
+Batch tracing of many scripts using a pool of worker processes.
+
+`pytrace.core.sandbox.Sandbox` swaps global standard streams and input
+queue, so scripts can't be traced concurrently within a single process.
+"""
+
+import multiprocessing
+from itertools import repeat
+
+from six.moves import zip
+
+from pytrace.conf import settings
+from pytrace.tracer import AbstractTraceRecorder, ControlledTraceRecorder
+
+
+# Trace recorder reused by all jobs of current worker process
+_recorder = None
+
+
+def _initialize_worker(tracer_class, options):
+    global _recorder
+    _recorder = tracer_class(**options)
+
+
+def _trace_job(job):
+    index, script, input_queue = job
+    return index, _recorder.run(script, input_queue=input_queue)
+
+
+def trace_many(scripts, inputs=None, processes=None, ordered=True,
+               max_jobs_per_worker=None, chunksize=1,
+               tracer_class=ControlledTraceRecorder, **options):
+    """
+    Traces each of `scripts` with the respective input queue from `inputs`
+    within a pool of `processes` worker processes (defaults to number of
+    CPUs) and yields results as they become available. Jobs are sent to
+    workers in chunks of `chunksize` scripts.
+
+    If `ordered` is set, traces are yielded in order of `scripts`,
+    otherwise `(index, trace)` pairs are yielded in order of completion.
+    Every worker creates a single `tracer_class` recorder using `options`
+    and is replaced after tracing `max_jobs_per_worker` scripts (defaults
+    to `BATCH_MAX_JOBS_PER_WORKER`) to contain leaks. Workers are only
+    replaced between chunks, so a worker traces at least one chunk.
+
+    Workers inherit settings at the time of pool creation only on
+    platforms where processes are forked.
+    """
+    assert issubclass(tracer_class, AbstractTraceRecorder)
+
+    if inputs is None:
+        inputs = repeat(None)
+    elif hasattr(scripts, '__len__') and hasattr(inputs, '__len__') and \
+            len(scripts) != len(inputs):
+        raise ValueError("Got %d inputs for %d scripts" % (
+            len(inputs), len(scripts)))
+
+    if max_jobs_per_worker is None:
+        max_jobs_per_worker = settings.BATCH_MAX_JOBS_PER_WORKER
+
+    # Pool counts chunks sent to a worker rather than scripts
+    max_chunks_per_worker = None
+    if max_jobs_per_worker is not None:
+        max_chunks_per_worker = max(1, max_jobs_per_worker // chunksize)
+
+    jobs = (
+        (index, script, input_queue)
+        for index, (script, input_queue) in enumerate(zip(scripts, inputs))
+    )
+
+    return _trace_jobs(jobs, processes, ordered, max_chunks_per_worker,
+                       chunksize, tracer_class, options)
+
+
+def _trace_jobs(jobs, processes, ordered, max_chunks_per_worker, chunksize,
+                tracer_class, options):
+    pool = multiprocessing.Pool(
+        processes,
+        initializer=_initialize_worker,
+        initargs=(tracer_class, options),
+        maxtasksperchild=max_chunks_per_worker
+    )
+
+    try:
+        if ordered:
+            for _, trace in pool.imap(_trace_job, jobs, chunksize):
+                yield trace
+        else:
+            for result in pool.imap_unordered(_trace_job, jobs, chunksize):
+                yield result
+
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
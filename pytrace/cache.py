@@ -0,0 +1,247 @@
+"""
+Content addressed cache of recorded traces.
+"""
+
+import os
+import sys
+import hashlib
+import tempfile
+from collections import OrderedDict
+
+from six.moves import cPickle as pickle
+
+from pytrace.conf import settings
+from pytrace.core.debugger import get_debugger_class
+
+
+# Settings which affect recorded traces and hence are part of cache key
+CACHE_KEY_SETTINGS = (
+    'MAX_STEPS',
+    'KEYFRAME_INTERVAL',
+    'SAFE_MODULES',
+    'UNSAFE_BUILTINS',
+    'IGNORE_VARS',
+    'PRIMITIVE_TYPES',
+    'REDIRECT_STDOUT',
+    'REDIRECT_STDERR',
+    'TYPED_ARRAY_MIN_LENGTH',
+    'MAX_ENCODING_DEPTH',
+    'MAX_HEAP_ENTRIES',
+    'MAX_COLLECTION_ELEMENTS',
+    'MAX_REPR_LENGTH',
+    'SHALLOW_ENCODING_DEPTH',
+    'OPAQUE_FUNCTIONS',
+)
+
+CACHE_FILE_SUFFIX = '.trace'
+
+_replace = getattr(os, 'replace', os.rename)
+
+
+def get_class_path(cls):
+    return "%s.%s" % (cls.__module__, cls.__name__)
+
+
+def make_key(script, input_queue, tracer_class, options):
+    """
+    Returns hash of everything that affects the recorded trace of `script`,
+    including version of Python and debugger used to record it
+    """
+    options = dict(options)
+    debugger_class = get_debugger_class(options.pop('backend', None))
+    parts = [
+        script,
+        repr(list(input_queue or ())),
+        get_class_path(tracer_class),
+        repr(sorted(options.items())),
+        "python=%d.%d" % sys.version_info[:2],
+        get_class_path(debugger_class),
+    ]
+
+    for name in CACHE_KEY_SETTINGS:
+        parts.append("%s=%r" % (name, getattr(settings, name, None)))
+
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+
+    return digest.hexdigest()
+
+
+class TraceCache(object):
+    """
+    Least recently used cache of recorded traces with optional on-disk store.
+
+    At most `max_entries` traces are kept in memory. If `directory` is
+    specified, every trace is also stored there and least recently used
+    files are removed once their total size exceeds `max_disk_size` bytes.
+    Stored files are listed once, and then tracked as they are used.
+    Traces are stored pickled, so every lookup returns a fresh copy.
+    """
+
+    def __init__(self, max_entries=None, directory=None, max_disk_size=None):
+        if max_entries is None:
+            max_entries = settings.TRACE_CACHE_MAX_ENTRIES
+
+        if max_disk_size is None:
+            max_disk_size = settings.TRACE_CACHE_MAX_DISK_SIZE
+
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_size = max_disk_size
+
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self._entries = OrderedDict()
+        self._files = None  # name -> size of stored files, least recent first
+        self._disk_size = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'diskHits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'diskEvictions': self.disk_evictions,
+            'entries': len(self._entries),
+        }
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key + CACHE_FILE_SUFFIX)
+
+    def _remember(self, key, data):
+        self._entries.pop(key, None)
+        self._entries[key] = data
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read(self, key):
+        path = self._get_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except (IOError, OSError):
+            return None
+
+        os.utime(path, None)  # Mark as recently used
+        self._touch_file(key, len(data))
+        return data
+
+    def _write(self, key, data):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+
+        _replace(temp_path, self._get_path(key))
+        self._touch_file(key, len(data))
+        self._evict_files()
+
+    def _load_files(self):
+        "Returns stored files, which are listed from directory only once"
+        if self._files is not None:
+            return self._files
+
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(CACHE_FILE_SUFFIX):
+                continue
+
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue  # Removed meanwhile
+
+            files.append((stat.st_mtime, name, stat.st_size))
+
+        files.sort()
+        self._files = OrderedDict((name, size) for _, name, size in files)
+        self._disk_size = sum(self._files.values())
+        return self._files
+
+    def _touch_file(self, key, size):
+        "Marks stored file of `key` as most recently used"
+        files = self._load_files()
+        name = key + CACHE_FILE_SUFFIX
+        self._disk_size += size - files.pop(name, 0)
+        files[name] = size
+
+    def _evict_files(self):
+        if self.max_disk_size is None:
+            return
+
+        files = self._load_files()
+        while files and self._disk_size > self.max_disk_size:
+            name, size = files.popitem(last=False)
+            self._disk_size -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue
+
+            self.disk_evictions += 1
+
+    def get(self, key):
+        """
+        Returns copy of cached trace stored against `key` or None
+        """
+        data = self._entries.get(key)
+        if data is not None:
+            self._remember(key, data)
+            self.hits += 1
+            return pickle.loads(data)
+
+        if self.directory:
+            data = self._read(key)
+            if data is not None:
+                self._remember(key, data)
+                self.hits += 1
+                self.disk_hits += 1
+                return pickle.loads(data)
+
+        self.misses += 1
+        return None
+
+    def set(self, key, trace):
+        data = pickle.dumps(trace, pickle.HIGHEST_PROTOCOL)
+        self._remember(key, data)
+
+        if self.directory:
+            self._write(key, data)
+
+    def clear(self):
+        self._entries.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(CACHE_FILE_SUFFIX):
+                    os.remove(os.path.join(self.directory, name))
+
+            self._files = OrderedDict()
+            self._disk_size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def trace(self, script, input_queue, tracer_class, **options):
+        """
+        Returns cached trace of `script` or traces it and stores results
+        """
+        key = make_key(script, input_queue, tracer_class, options)
+        trace = self.get(key)
+        if trace is None:
+            trace = tracer_class(**options).run(script,
+                                                input_queue=input_queue)
+            self.set(key, trace)
+
+        return trace
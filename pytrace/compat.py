@@ -4,6 +4,7 @@ import inspect
 import six
 
 from pytrace.conf import settings
+from pytrace.core.codeinfo import get_code_info
 
 
 if six.PY3:
@@ -12,21 +13,41 @@ if six.PY3:
     def get_func_code(func):
         return func.__code__
 
-    def get_im_class(method):
+    def _defines(cls, func):
+        value = cls.__dict__.get(func.__name__)
+        return getattr(value, '__func__', value) is func
+
+    def _find_im_class(method, func):
         if inspect.ismethod(method):
-            for cls in inspect.getmro(method.__self__.__class__):
-                if cls.__dict__.get(method.__name__) is method:
+            owner = method.__self__
+            if not isinstance(owner, type):
+                owner = owner.__class__
+
+            for cls in inspect.getmro(owner):
+                if _defines(cls, func):
                     return cls
 
-            method = method.__func__  # fallback to __qualname__ parsing
+        # fallback to __qualname__ parsing
+        path = func.__qualname__.rsplit('.<locals>.', 1)[-1].split('.')[:-1]
+        if not path:
+            return None
+
+        cls = func.__globals__.get(path[0])
+        for name in path[1:]:
+            cls = getattr(cls, name, None)
+
+        if isinstance(cls, type):
+            return cls
+
+    def get_im_class(method):
+        func = getattr(method, '__func__', method)
+        info = get_code_info(func.__code__)
 
-        if inspect.isfunction(method):
-            class_name = method.__qualname__.split('.<locals>', 1)[0] \
-                            .rsplit('.', 1)[0]
+        cls = info.owner_class
+        if cls is None or not _defines(cls, func):
+            cls = info.owner_class = _find_im_class(method, func)
 
-            cls = getattr(inspect.getmodule(method), class_name)
-            if isinstance(cls, type):
-                return cls
+        return cls
 
     def is_class_instance(obj):
         return type(obj) not in settings.PRIMITIVE_TYPES and \
@@ -34,8 +55,8 @@ if six.PY3:
                not isinstance(obj, type)
 
     def is_lambda(obj):
-        if hasattr(obj, '__name__'):
-            return obj.__name__ == '<lambda>'
+        if hasattr(obj, '__code__'):
+            return get_code_info(obj.__code__).is_lambda
 
         return False
 
@@ -58,8 +79,8 @@ else:
                TYPE_RE.match(str(type(obj)))
 
     def is_lambda(obj):
-        if hasattr(obj, 'func_name'):
-            return obj.func_name == '<lambda>'
+        if hasattr(obj, 'func_code'):
+            return get_code_info(obj.func_code).is_lambda
 
         return False
 
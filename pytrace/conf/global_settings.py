@@ -63,6 +63,24 @@ UNSAFE_BUILTINS = (
 # read value from this queue instead of Standard Input Stream
 INPUT_QUEUE = deque()
 
+####################
+# DEBUGGER         #
+####################
+
+# Tracing backend used by recorders. `bdb` is built on top of
+# `sys.settrace`, `monitoring` uses `sys.monitoring` (Python 3.12+)
+# and `auto` uses `monitoring` whenever it is available.
+DEBUGGER_BACKEND = 'auto'
+
+# Number of recently compiled scripts kept in memory, so tracing same
+# script again doesn't need compilation and analysis of script
+COMPILE_CACHE_SIZE = 64
+
+# Names of script functions executed without being traced, along with
+# every function called from them. Same as functions of imported modules
+# and class bodies, these run at nearly native speed.
+OPAQUE_FUNCTIONS = ()
+
 ####################
 # RECORDER         #
 ####################
@@ -73,6 +91,33 @@ INPUT_QUEUE = deque()
 # loops or length programs.
 MAX_STEPS = 500
 
+# Number of steps between two full snapshots (keyframes) when recording
+# delta encoded traces. Every other step only holds changes made since
+# the previous step.
+KEYFRAME_INTERVAL = 50
+
+# Minimum length of lists, tuples and sets whose elements are all of same
+# numeric type (int, float or bool) to be encoded as a typed array i.e. a
+# single list of literals instead of a heap entry per element. Set to None
+# to encode every element separately.
+TYPED_ARRAY_MIN_LENGTH = 16
+
+# Budgets bounding the cost of encoding a single step. Objects nested
+# deeper than `MAX_ENCODING_DEPTH`, or encoded after `MAX_HEAP_ENTRIES`
+# objects were already encoded in a step, are recorded as a truncation
+# marker holding their heap id. Only first `MAX_COLLECTION_ELEMENTS` of
+# lists, tuples, sets and dicts are encoded, and reprs longer than
+# `MAX_REPR_LENGTH` are cut short. Set any of these to None to disable it.
+MAX_ENCODING_DEPTH = 100
+MAX_HEAP_ENTRIES = 10000
+MAX_COLLECTION_ELEMENTS = 1000
+MAX_REPR_LENGTH = 1000
+
+# Depth up to which objects are encoded by `ShallowTraceRecorder`. Objects
+# bound to variables are encoded, while objects referenced by them are only
+# recorded as truncation markers, i.e. name, type and heap id.
+SHALLOW_ENCODING_DEPTH = 1
+
 # List of variables which will be excluded while serialization of
 # class, instance or module attributes
 IGNORE_VARS = (
@@ -84,5 +129,21 @@ IGNORE_VARS = (
     '__module__'
 )
 
+# Number of scripts traced by a single worker process of
+# `pytrace.trace_many` before it gets replaced by a fresh one.
+# Set to None to keep workers alive till the end of the batch.
+BATCH_MAX_JOBS_PER_WORKER = 200
+
 # Fallback function name to use when failed to find function name
 UNKNOWN_FUNCTION = '<<Unnamed Function>>'
+
+####################
+# CACHE            #
+####################
+
+# Maximum number of traces held in memory by `pytrace.cache.TraceCache`
+TRACE_CACHE_MAX_ENTRIES = 128
+
+# Maximum total size in bytes of traces stored on disk by
+# `pytrace.cache.TraceCache`. Set to None for unlimited size.
+TRACE_CACHE_MAX_DISK_SIZE = 256 * 1024 * 1024
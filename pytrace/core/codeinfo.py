@@ -0,0 +1,92 @@
+"""
+Metadata of code objects shared by debuggers and serializers.
+"""
+
+import inspect
+import types
+import weakref
+
+
+CO_VARARGS = inspect.CO_VARARGS
+CO_VARKEYWORDS = inspect.CO_VARKEYWORDS
+
+LAMBDA_NAME = '<lambda>'
+
+
+class CodeInfo(object):
+    """
+    Details of a code object which are computed once i.e. layout of
+    arguments, whether it belongs to a lambda, its first line, class
+    owning the function and function owning the closure.
+    """
+
+    def __init__(self, code):
+        self.name = code.co_name
+        self.first_line = code.co_firstlineno
+        self.is_lambda = code.co_name == LAMBDA_NAME
+
+        names = code.co_varnames
+        count = code.co_argcount
+        kwonly_count = getattr(code, 'co_kwonlyargcount', 0)
+
+        self.args = names[:count]
+        self.kwonlyargs = names[count:count + kwonly_count]
+
+        count += kwonly_count
+        self.varargs = None
+        if code.co_flags & CO_VARARGS:
+            self.varargs = names[count]
+            count += 1
+
+        self.keywords = None
+        if code.co_flags & CO_VARKEYWORDS:
+            self.keywords = names[count]
+
+        # Names of every argument in order of `co_varnames`
+        self.arguments = names[:count + bool(self.keywords)]
+
+        # Names of locals in order they are recorded, variables of code
+        # followed by its cell and free variables sorted by name
+        cells = set(code.co_cellvars + code.co_freevars).difference(names)
+        self.local_names = names + tuple(sorted(cells))
+
+        # Code of functions, lambdas and classes defined within code
+        self.nested_codes = frozenset(
+            e for e in code.co_consts if isinstance(e, types.CodeType)
+        )
+
+        self._owner_class = None
+        self._parent = None
+
+    @property
+    def owner_class(self):
+        if self._owner_class is not None:
+            return self._owner_class()
+
+    @owner_class.setter
+    def owner_class(self, cls):
+        self._owner_class = weakref.ref(cls) if cls is not None else None
+
+    @property
+    def parent(self):
+        if self._parent is not None:
+            return self._parent()
+
+    @parent.setter
+    def parent(self, func):
+        self._parent = weakref.ref(func) if func is not None else None
+
+
+_cache = weakref.WeakKeyDictionary()
+
+
+def get_code_info(code):
+    """
+    Returns cached `CodeInfo` of specified code object. Info is dropped
+    along with code object.
+    """
+    try:
+        return _cache[code]
+    except KeyError:
+        info = _cache[code] = CodeInfo(code)
+        return info
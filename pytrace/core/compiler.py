@@ -0,0 +1,76 @@
+"""
+Compilation of scripts along with their static analysis.
+"""
+
+import ast
+import hashlib
+from collections import OrderedDict
+
+import six
+
+from pytrace.conf import settings
+
+
+SCRIPT_FILENAME = "<string>"
+
+
+def get_first_line(node):
+    """
+    Returns first line of node including decorators, which is what
+    `co_firstlineno` of the compiled code object points to
+    """
+    lines = [node.lineno]
+    lines.extend(e.lineno for e in getattr(node, 'decorator_list', ()))
+    return min(lines)
+
+
+class CompiledScript(object):
+    """
+    Compiled code object of a script and details of the script collected
+    from its syntax tree i.e. first lines of class bodies.
+    """
+
+    def __init__(self, script):
+        self.source = script
+        self.lines = tuple(script.splitlines())
+
+        tree = ast.parse(script, SCRIPT_FILENAME)
+        self.code = compile(tree, SCRIPT_FILENAME, 'exec')
+
+        self.class_bodies = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ClassDef):
+                self.class_bodies.add((get_first_line(node), node.name))
+
+    def is_class_body(self, code):
+        return (code.co_firstlineno, code.co_name) in self.class_bodies
+
+
+_cache = OrderedDict()
+
+
+def compile_script(script):
+    """
+    Returns `CompiledScript` of `script`. Recently compiled scripts are
+    cached by hash of their source, so tracing same script again doesn't
+    need compilation. Raises SyntaxError on invalid script.
+    """
+    source = script
+    if isinstance(source, six.text_type):
+        source = source.encode('utf-8')
+
+    key = hashlib.sha1(source).hexdigest()
+
+    compiled_script = _cache.pop(key, None)
+    if compiled_script is None:
+        compiled_script = CompiledScript(script)
+
+    _cache[key] = compiled_script
+    while len(_cache) > settings.COMPILE_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+    return compiled_script
+
+
+def clear_cache():
+    _cache.clear()
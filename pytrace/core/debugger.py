@@ -2,26 +2,22 @@
 Managed Python Debugger
 """
 
-import re
 import sys
 import logging
-import inspect
 
+from abc import abstractmethod
 from bdb import Bdb
 from enum import Enum
 
+from pytrace.conf import settings
+from pytrace.core.compiler import SCRIPT_FILENAME, compile_script
+from pytrace.core.frames import FrameSnapshot
 from pytrace.core.sandbox import Sandbox
 
 
-CLASS_DEF_REGEX = re.compile('^\\s+class\\s+')
 logger = logging.getLogger("pytrace")
 
 
-def contains_class_defination(line):
-    "Returns True if line contains class defination otherwise False"
-    return CLASS_DEF_REGEX.match(line)
-
-
 class DebuggerEvent(Enum):
     "Events triggered by `ManagedDebugger`"
     StepLine = 1            # Control jumped to next line
@@ -32,76 +28,205 @@ class DebuggerEvent(Enum):
     SystemError = 6         # Internal System Error while executing code
 
 
-class ManagedDebugger(object):
-    """ Managed Python Debugger """
+class BaseDebugger(object):
+    """
+    Base class for debuggers executing scripts within `Sandbox` and
+    reporting `DebuggerEvent` to action handler.
+
+    Traced frames are kept in `frames` (script module frame first) while
+    reporting events, so handlers don't need to walk the stack. Frames are
+    pushed on their first event and popped once they exit.
+
+    Events of a frame are reported along with `snapshot`, a `FrameSnapshot`
+    of that frame which handlers use instead of reading frame on their own.
+    """
 
-    _wait_stack_height = 0
     _done = False
     _excep_logged = False
-    _script_lines = []
+    _script = None
+    script_lines = ()
+    frames = ()
 
     def __init__(self, action_handler, **kwargs):
-        super(ManagedDebugger, self).__init__(**kwargs)
-        self._bdb = Bdb()
+        super(BaseDebugger, self).__init__(**kwargs)
         self._sandbox = Sandbox()
         self._handler = action_handler
 
-        self._bdb.user_call = self._bdb_call
-        self._bdb.user_line = self._bdb_line
-        self._bdb.user_return = self._bdb_return
-        self._bdb.user_exception = self._bdb_exception
-
     def _initialize(self):
         self._done = False
         self._excep_logged = False
+        self.frames = []
+        self._frame_depths = {}   # frame -> index within `frames`
+
+    def _extract_passed_arguments(self, snapshot):
+        frame_locals = snapshot.frame_locals
+        return {
+            arg: frame_locals[arg]
+            for arg in snapshot.info.arguments
+            if arg in frame_locals
+        }
 
-        self._wait_stack_height = 0
+    def is_class_body(self, code):
+        return self._script.is_class_body(code)
+
+    def is_opaque_code(self, code):
+        """
+        Returns True if code should be executed without being traced i.e.
+        code outside of script, class bodies and `OPAQUE_FUNCTIONS`
+        """
+        return code.co_filename != SCRIPT_FILENAME or \
+            code.co_name in settings.OPAQUE_FUNCTIONS or \
+            self.is_class_body(code)
+
+    def _enter_frame(self, frame):
+        frames = self.frames
+        if frames and frames[-1] is frame:
+            return
 
-    # bdb Callbacks
-    def _bdb_call(self, frame, args):
-        if self._done:
-            return  # Execution is stopped
+        depth = self._frame_depths.get(frame)
+        if depth is None:
+            self._frame_depths[frame] = len(frames)
+            frames.append(frame)
+        else:
+            self._unwind_frames(depth + 1)  # Frames above it have exited
 
-        if frame.f_code.co_filename != "<string>" or frame.f_lineno <= 0:
-            self._wait_stack_height += 1
-            return
+    def _exit_frame(self, frame):
+        depth = self._frame_depths.get(frame)
+        if depth is not None:
+            self._unwind_frames(depth)
 
-        if self._wait_stack_height:
-            self._wait_stack_height += 1
-            return
+    def _unwind_frames(self, depth):
+        frame_depths = self._frame_depths
+        for frame in self.frames[depth:]:
+            del frame_depths[frame]
 
-        if not self._bdb.stop_here(frame):
-            return
+        del self.frames[depth:]
 
-        script_line = self._get_script_line(frame.f_code.co_firstlineno)
-        if contains_class_defination(script_line):
-            self._wait_stack_height = 1
-            return
+    def trigger(self, event, *args, **kwargs):
+        frame = kwargs.get('frame')
+        if frame is None:
+            return self._handler(event, *args, **kwargs)
 
-        args = self._extract_passed_arguments(frame)
-        self.trigger(DebuggerEvent.EnterBlock, frame=frame, arguments=args)
+        if kwargs.get('snapshot') is None:
+            kwargs['snapshot'] = FrameSnapshot(frame)
 
-    def _extract_passed_arguments(self, frame):
-        function = frame.f_globals[frame.f_code.co_name]
-        arg_specs = inspect.getargspec(function)
+        self._enter_frame(frame)
+        try:
+            return self._handler(event, *args, **kwargs)
+        finally:
+            if event == DebuggerEvent.ExitBlock:
+                self._exit_frame(frame)
 
-        args = {
-            arg: frame.f_locals[arg]
-            for arg in arg_specs.args
-        }
+    @property
+    def stdout(self):
+        return self._sandbox.stdout
 
-        if arg_specs.varargs:
-            args[arg_specs.varargs] = frame.f_locals[arg_specs.varargs]
+    @property
+    def stdout_offset(self):
+        return self._sandbox.stdout_offset
 
-        if arg_specs.keywords:
-            args[arg_specs.keywords] = frame.f_locals[arg_specs.keywords]
+    def stdout_since(self, offset):
+        return self._sandbox.stdout_since(offset)
 
-        return args
+    def suspended(self):
+        return self._sandbox.suspended()
 
-    def _bdb_line(self, frame):
-        if self._done or self._wait_stack_height:
+    def _execute(self, script, user_globals, user_locals):
+        self._script = compile_script(script)
+        self.script_lines = self._script.lines
+        self._execute_code(self._script.code, user_globals, user_locals)
+
+    @abstractmethod
+    def _execute_code(self, code, user_globals, user_locals):
+        """
+        Executes compiled script with globals and locals prepared by sandbox
+        """
+        pass
+
+    def run(self, script, input_queue=None):
+        self._initialize()
+
+        try:
+            self._sandbox.run(script, input_queue, runner=self._execute)
+        except SyntaxError as ex:
+            self.script_lines = tuple(script.splitlines())
+            self.trigger(DebuggerEvent.SyntaxError, exception=ex)
+        except:
+            if not self._excep_logged:
+                logger.exception(
+                    "Internal Error in Debugger\n"
+                    "Script:\n%s\n"
+                    "Input Queue:%s",
+                    script, input_queue
+                )
+                ex_type, value, tb = sys.exc_info()
+                self.trigger(DebuggerEvent.SystemError, type=ex_type,
+                             value=value, traceback=tb)
+        finally:
+            self._done = True
+            self._unwind_frames(0)
+
+
+class UserCodeBdb(Bdb):
+    """
+    `bdb.Bdb` that doesn't install local trace function for frames marked
+    opaque by `debugger`. So lines of these frames, and of every frame
+    called from them, run without passing through `Bdb.trace_dispatch`
+    """
+
+    def __init__(self, debugger, *args, **kwargs):
+        Bdb.__init__(self, *args, **kwargs)
+        self._debugger = debugger
+
+    def is_opaque_frame(self, frame):
+        caller = frame.f_back
+        if caller is not None and caller is not self.botframe and \
+           caller.f_trace is None:
+            return True  # Called from an untraced frame
+
+        return frame.f_lineno <= 0 or \
+            self._debugger.is_opaque_code(frame.f_code)
+
+    def dispatch_call(self, frame, arg):
+        if self.botframe is None:
+            if frame.f_code.co_filename != SCRIPT_FILENAME:
+                return  # i.e. weakref callbacks run by gc before script
+
+        elif self.is_opaque_frame(frame):
+            return  # No need to trace this function
+
+        return Bdb.dispatch_call(self, frame, arg)
+
+
+class ManagedDebugger(BaseDebugger):
+    """ Managed Python Debugger built on top of `bdb.Bdb` """
+
+    def __init__(self, action_handler, **kwargs):
+        super(ManagedDebugger, self).__init__(action_handler, **kwargs)
+        self._bdb = UserCodeBdb(self)
+
+        self._bdb.user_call = self._bdb_call
+        self._bdb.user_line = self._bdb_line
+        self._bdb.user_return = self._bdb_return
+        self._bdb.user_exception = self._bdb_exception
+
+    # bdb Callbacks
+    def _bdb_call(self, frame, args):
+        if self._done:
+            return  # Execution is stopped
+
+        if not self._bdb.stop_here(frame):
             return
 
+        snapshot = FrameSnapshot(frame)
+        args = self._extract_passed_arguments(snapshot)
+        self.trigger(DebuggerEvent.EnterBlock, frame=frame, snapshot=snapshot,
+                     arguments=args)
+
+    def _bdb_line(self, frame):
+        if self._done or frame.f_code.co_filename != SCRIPT_FILENAME:
+            return  # i.e. caller of script, traced by `Bdb` on Python 3.13+
+
         self._excep_logged = False
         self.trigger(DebuggerEvent.StepLine, frame=frame)
 
@@ -109,13 +234,12 @@ class ManagedDebugger(object):
         if self._done:
             return
 
-        if self._wait_stack_height:
-            self._wait_stack_height -= 1
-        elif frame.f_code.co_filename == "<string>":
-            self.trigger(DebuggerEvent.ExitBlock, frame=frame, return_value=value)
+        if frame.f_code.co_filename == SCRIPT_FILENAME:
+            self.trigger(DebuggerEvent.ExitBlock, frame=frame,
+                         return_value=value)
 
     def _bdb_exception(self, frame, info):
-        if self._done or self._wait_stack_height:
+        if self._done or frame.f_code.co_filename != SCRIPT_FILENAME:
             return
 
         self._excep_logged = True
@@ -124,37 +248,38 @@ class ManagedDebugger(object):
         self.trigger(DebuggerEvent.Exception, frame=frame, ex_type=ex_type,
                      value=value, traceback=tb)
 
-    def trigger(self, event, *args, **kwargs):
-        return self._handler(event, *args, **kwargs)
+    def _execute_code(self, code, user_globals, user_locals):
+        self._bdb.run(code, user_globals, user_locals)
 
-    def _get_script_line(self, n):
-        return self.script_lines[n - 1]
 
-    def get_stack(self, frame, tb):
-        return self._bdb.get_stack(frame, tb)
+def is_monitoring_available():
+    "Returns True if `sys.monitoring` (PEP 669) is available"
+    return hasattr(sys, 'monitoring')
 
-    @property
-    def stdout(self):
-        return self._sandbox.stdout
 
-    def run(self, script, input_queue=None):
-        self._initialize()
+def get_debugger_class(backend=None):
+    """
+    Returns debugger class for specified backend. Available backends are
+    `bdb`, `monitoring` and `auto`, which uses `monitoring` whenever
+    it's available and falls back to `bdb` otherwise.
 
-        try:
-            self.script_lines = script.splitlines()
-            self._sandbox.run(script, input_queue, runner=self._bdb.run)
-        except SyntaxError as ex:
-            self.trigger(DebuggerEvent.SyntaxError, exception=ex)
-        except:
-            if not self._excep_logged:
-                logger.exception(
-                    "Internal Error in Debugger\n"
-                    "Script:\n%s\n"
-                    "Input Queue:%s",
-                    script, input_queue
-                )
-                ex_type, value, tb = sys.exc_info()
-                self.trigger(DebuggerEvent.SystemError, type=ex_type,
-                             value=value, traceback=tb)
-        finally:
-            self._done = True
+    If not specified `DEBUGGER_BACKEND` setting is used.
+    """
+    if backend is None:
+        backend = settings.DEBUGGER_BACKEND
+
+    if backend == 'auto':
+        backend = 'monitoring' if is_monitoring_available() else 'bdb'
+
+    if backend == 'monitoring':
+        from pytrace.core.monitoring import MonitoringDebugger
+        return MonitoringDebugger
+
+    if backend == 'bdb':
+        return ManagedDebugger
+
+    raise ValueError("Unknown debugger backend `%s`" % backend)
+
+
+def create_debugger(action_handler, backend=None, **kwargs):
+    return get_debugger_class(backend)(action_handler, **kwargs)
@@ -0,0 +1,75 @@
+"""
+Snapshot of the frame of a debugger event, shared by everything handling
+that event.
+"""
+
+from pytrace.conf import settings
+from pytrace.core.codeinfo import get_code_info
+
+
+def filter_vars_dict(vars_dict):
+    """
+    Removes all the IGNORE_VARS from variables dictionary
+    Returns a new dictionary instead of altering existing.
+    """
+    filtered_vars = {}
+    ignore_vars = settings.IGNORE_VARS
+    for k in vars_dict:
+        if k not in ignore_vars:
+            filtered_vars[k] = vars_dict[k]
+
+    return filtered_vars
+
+
+class FrameSnapshot(object):
+    """
+    Frame of a debugger event along with its locals, globals and code
+    metadata. Reading `f_locals` isn't cheap, so each of these is read
+    from frame on its first access only and then shared by debugger,
+    trace recorder, signal receivers and serializers handling the event.
+
+    Snapshot is only valid while its event is being handled.
+    """
+
+    __slots__ = ('frame', 'code', '_info', '_frame_locals', '_locals',
+                 '_globals')
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.code = frame.f_code
+        self._info = None
+        self._frame_locals = None
+        self._locals = None
+        self._globals = None
+
+    @property
+    def info(self):
+        "`CodeInfo` of code of frame"
+        if self._info is None:
+            self._info = get_code_info(self.code)
+
+        return self._info
+
+    @property
+    def frame_locals(self):
+        "Locals of frame as they are, including ignored variables"
+        if self._frame_locals is None:
+            self._frame_locals = self.frame.f_locals
+
+        return self._frame_locals
+
+    @property
+    def locals(self):
+        "Locals of frame without `IGNORE_VARS`"
+        if self._locals is None:
+            self._locals = filter_vars_dict(self.frame_locals)
+
+        return self._locals
+
+    @property
+    def globals(self):
+        "Globals of frame without `IGNORE_VARS`"
+        if self._globals is None:
+            self._globals = filter_vars_dict(self.frame.f_globals)
+
+        return self._globals
@@ -36,9 +36,36 @@ def is_constant(type_):
     return type_ in CONSTANT_TYPES or BuiltinBase in type.mro(type_)
 
 
+CONSTANT = -1  # Stamp of constant entries
+
+
+class HeapId(str):
+    """
+    Address of an object within heap, i.e. `0x1`. Being a string, it's
+    written to JSON as it is.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, index):
+        return super(HeapId, cls).__new__(cls, hex(index))
+
+    def __reduce__(self):
+        return HeapId, (int(self, 16),)
+
+
 class Heap(object):
     """
     Heap memory representation. Assign arbitrary address to stored objects.
+
+    Addresses are `HeapId`s of integers indexing arrays of encoded values
+    and stamps. Stamp of an entry is either `CONSTANT` or number of step in
+    which variable was last stored, so variables of previous steps are
+    dropped just by moving to next step.
+
+    Every object assigned an address is kept alive until heap is cleared,
+    otherwise its `id` could be reused by another object which would then
+    be given the address (and encoded value) of the freed one.
     """
 
     def __init__(self):
@@ -46,27 +73,118 @@ class Heap(object):
         self.reset()
 
     def get_variables(self):
-        return dict(self._variables)
+        keys, entries = self._keys, self._entries
+        return {keys[i]: entries[i] for i in self._variable_ids}
+
+    def get_constants(self, start=0):
+        """
+        Returns stored constants. If `start` is specified only constants
+        stored after first `start` constants will be returned.
+        """
+        keys, entries = self._keys, self._entries
+        return {keys[i]: entries[i] for i in self._const_ids[start:]}
+
+    @property
+    def constants_count(self):
+        return len(self._const_ids)
 
-    def get_constants(self):
-        return dict(self._consts)
+    def get_objects(self, start=0):
+        """
+        Returns objects assigned an address, in order they were assigned.
+        If `start` is specified first `start` objects are left out.
+        """
+        return self._objects[start + 1:]
+
+    @property
+    def objects_count(self):
+        return len(self._objects) - 1
 
     def clear(self):
-        self._consts = {}
-        self._id_mappings = {}
-        self._seed = 1
+        self._ids = {}              # id(object) -> index
+        self._objects = [None]      # index -> object, keeps its id unique
+        self._keys = [None]         # index -> HeapId, 0 is unused
+        self._entries = [None]      # index -> encoded value
+        self._stamps = [0]          # index -> stamp
+        self._const_ids = []
+        self._constant_types = {}   # type -> is_constant(type)
+        self._step = 0
 
     def reset(self):
-        self._variables = {}
+        self._step += 1
+        self._variable_ids = []
+
+    def is_constant_type(self, type_):
+        try:
+            return self._constant_types[type_]
+        except KeyError:
+            constant = self._constant_types[type_] = is_constant(type_)
+            return constant
+
+    def _is_stored(self, index):
+        stamp = self._stamps[index]
+        return stamp == self._step or stamp == CONSTANT
+
+    def _store_variable(self, index, encoded_value):
+        if self._stamps[index] != self._step:
+            self._stamps[index] = self._step
+            self._variable_ids.append(index)
+
+        self._entries[index] = encoded_value
 
     def __getitem__(self, key):
-        if key in self._consts:
-            return self._consts[key]
+        index = int(key, 16)
+        if 0 < index < len(self._entries) and self._is_stored(index):
+            return self._entries[index]
 
-        return self._variables[key]
+        raise KeyError(key)
 
     def __len__(self):
-        return len(self._variables) + len(self._consts)
+        return len(self._variable_ids) + len(self._const_ids)
+
+    def branch(self):
+        """
+        Returns an empty heap which assigns same addresses to objects as
+        this heap does, and new addresses to rest of the objects
+        """
+        heap = Heap()
+        heap._ids = dict(self._ids)
+        heap._objects = list(self._objects)
+        heap._keys = list(self._keys)
+        heap._entries = [None] * len(self._entries)
+        heap._stamps = [0] * len(self._stamps)
+        return heap
+
+    def _get_index(self, actual_value):
+        index = self._ids.get(id(actual_value))
+        if index is None:
+            index = self._ids[id(actual_value)] = len(self._entries)
+            self._objects.append(actual_value)
+            self._keys.append(HeapId(index))
+            self._entries.append(None)
+            self._stamps.append(0)
+
+        return index
+
+    def get_id(self, actual_value):
+        """
+        Returns address of object, assigning it a new one if it doesn't have
+        any, without storing anything against it
+        """
+        return self._keys[self._get_index(actual_value)]
+
+    def _store(self, encoded_value, actual_value):
+        index = self._get_index(actual_value)
+        if self._is_stored(index):
+            return index
+
+        if self.is_constant_type(type(actual_value)):
+            self._stamps[index] = CONSTANT
+            self._const_ids.append(index)
+            self._entries[index] = encoded_value
+        else:
+            self._store_variable(index, encoded_value)
+
+        return index
 
     def store(self, encoded_value, actual_value=None):
         """
@@ -76,19 +194,109 @@ class Heap(object):
         if actual_value is None:
             actual_value = encoded_value
 
-        obj_id = id(actual_value)
-        fake_id = hex(self._seed)
+        return self._keys[self._store(encoded_value, actual_value)]
 
-        if obj_id in self._id_mappings:
-            fake_id = self._id_mappings[obj_id]
-            if fake_id in self._variables or fake_id in self._consts:
-                return fake_id
 
-        self._id_mappings[obj_id] = fake_id
-        if is_constant(type(actual_value)):
-            self._consts[fake_id] = encoded_value
-        else:
-            self._variables[fake_id] = encoded_value
+class PersistentHeap(Heap):
+    """
+    Heap keeping encoded objects across steps. Along with encoded value,
+    stored object and its fingerprint are kept until next step, so
+    unchanged objects can be retained without being encoded again.
+
+    Tracks variables changed since last `commit`.
+    """
+
+    def clear(self):
+        super(PersistentHeap, self).clear()
+        self._retained = {}     # index -> (object, fingerprint, encoded)
+        self._committed = {}    # index -> encoded value
+        self._visited = set()
+
+    def reset(self):
+        if self._visited:
+            # Release objects which were not stored in previous step
+            for index in set(self._retained).difference(self._visited):
+                del self._retained[index]
+
+        super(PersistentHeap, self).reset()
+        self._visited = set()
+        self._dirty = set()
+
+    def _mark_stored(self, index, encoded_value):
+        if self._stamps[index] != CONSTANT and \
+           self._committed.get(index) is not encoded_value:
+            self._dirty.add(index)
+
+        self._visited.add(index)
+
+    def retain_constant(self, value):
+        """
+        Returns address of `value` if it's a stored constant without any
+        references i.e. numbers and strings, which can't change at all.
+        Returns None otherwise.
+        """
+        index = self._ids.get(id(value))
+        entry = self._retained.get(index)
+        if entry is None or entry[0] is not value or \
+           self._stamps[index] != CONSTANT or entry[1] is None or entry[1][2]:
+            return None
+
+        self._visited.add(index)
+        return self._keys[index]
+
+    def retain(self, value, fingerprint):
+        """
+        Stores previously encoded value of `value` again if its fingerprint
+        didn't change and returns its address. Returns None otherwise.
+        """
+        index = self._ids.get(id(value))
+        entry = self._retained.get(index)
+        if entry is None or entry[0] is not value or entry[1] != fingerprint:
+            return None
+
+        encoded_value = entry[2]
+        if self._stamps[index] != CONSTANT:
+            self._store_variable(index, encoded_value)
+
+        self._mark_stored(index, encoded_value)
+        return self._keys[index]
+
+    def store(self, encoded_value, actual_value=None, fingerprint=None):
+        if actual_value is None:
+            actual_value = encoded_value
+
+        index = self._ids.get(id(actual_value))
+        if index in self._visited:
+            return self._keys[index]
+
+        index = self._store(encoded_value, actual_value)
+        encoded_value = self._entries[index]
+        if self._committed.get(index) == encoded_value:
+            encoded_value = self._committed[index]  # Same as committed
+            self._entries[index] = encoded_value
+
+        self._retained[index] = (actual_value, fingerprint, encoded_value)
+        self._mark_stored(index, encoded_value)
+        return self._keys[index]
+
+    def commit(self):
+        """
+        Returns changes made to variables since last commit, as `set` of
+        changed entries and `del` list of removed addresses
+        """
+        changes = {}
+        keys, entries = self._keys, self._entries
+        variables = {i: entries[i] for i in self._variable_ids}
+
+        removed = sorted(set(self._committed).difference(variables))
+        if removed:
+            changes['del'] = [keys[i] for i in removed]
+
+        modified = {keys[i]: variables[i] for i in self._dirty
+                    if i in variables}
+        if modified:
+            changes['set'] = modified
 
-        self._seed += 1
-        return fake_id
+        self._committed = variables
+        self._dirty = set()
+        return changes
@@ -0,0 +1,94 @@
+"""
+Hash consing of encoded values.
+"""
+
+from pytrace.core.heap import HeapId
+from pytrace.core.records import Record
+
+
+LEAF_TYPES = (str, int, float, bool, type(None), HeapId)
+
+try:
+    LEAF_TYPES += (unicode, long)  # NOQA
+except NameError:
+    pass
+
+
+class InternTable(object):
+    """
+    Stores structurally identical encoded values only once. Interning a
+    value returns the canonical copy of it, in which identical dicts and
+    lists (at any depth) are shared. Canonical values can be indexed, so
+    they can be referenced by a small integer instead.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._canonical = {}    # structure key -> canonical value
+        self._keys = {}         # id(canonical value) -> structure key
+        self._indices = {}      # id(canonical value) -> index
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def _get_key(self, value):
+        "Returns structure key of an interned `value`"
+        if type(value) in LEAF_TYPES:
+            return type(value), value
+
+        key = self._keys.get(id(value))
+        if key is None:
+            # Neither primitive nor a container, is kept alive by its parent
+            key = type(value), id(value)
+
+        return key
+
+    def intern(self, value):
+        """
+        Returns canonical copy of encoded `value`, which is made of dicts,
+        lists, records and primitive values
+        """
+        if id(value) in self._keys:
+            return value  # Already canonical
+
+        value_type = type(value)
+        if isinstance(value, (dict, Record)):
+            items = [(k, self.intern(v)) for k, v in value.items()]
+            key = (value_type, tuple(
+                (self._get_key(k), self._get_key(v)) for k, v in items
+            ))
+        elif isinstance(value, (list, tuple)):
+            items = [self.intern(e) for e in value]
+            key = (value_type, tuple(self._get_key(e) for e in items))
+        else:
+            return value
+
+        canonical = self._canonical.get(key)
+        if canonical is None:
+            if isinstance(value, Record):
+                canonical = value_type()
+                for k, v in items:
+                    canonical[k] = v
+            else:
+                canonical = value_type(items)
+
+            self._canonical[key] = canonical
+            self._keys[id(canonical)] = key
+
+        return canonical
+
+    def index(self, value):
+        "Interns `value` and returns its index within `values`"
+        value = self.intern(value)
+        if type(value) in LEAF_TYPES:
+            raise ValueError("Only dicts, lists and records can be indexed")
+
+        index = self._indices.get(id(value))
+        if index is None:
+            index = self._indices[id(value)] = len(self.values)
+            self.values.append(value)
+
+        return index
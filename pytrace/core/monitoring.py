@@ -0,0 +1,229 @@
+"""
+Debugger built on top of `sys.monitoring` (PEP 669) for Python 3.12+
+"""
+
+import sys
+
+from pytrace.core.compiler import SCRIPT_FILENAME
+from pytrace.core.debugger import BaseDebugger, DebuggerEvent
+from pytrace.core.frames import FrameSnapshot
+
+
+monitoring = getattr(sys, 'monitoring', None)
+
+
+class MonitoringDebugger(BaseDebugger):
+    """
+    Managed debugger using `sys.monitoring` instead of `sys.settrace`.
+
+    Only call events are monitored globally, which are disabled for every
+    code object outside of the executing script. Line and return events
+    are only enabled for code objects of the script, so modules imported
+    by script run at native speed. Emits the same `DebuggerEvent` as
+    `ManagedDebugger`.
+
+    Like `sys.settrace`, a backward jump to the line being executed (i.e.
+    a loop or comprehension written on a single line) is reported as a
+    step to that line, which `LINE` events leave out.
+    """
+
+    def __init__(self, action_handler, **kwargs):
+        assert monitoring is not None, \
+            "sys.monitoring is only available on Python 3.12+"
+        super(MonitoringDebugger, self).__init__(action_handler, **kwargs)
+        self._tool_id = None
+
+    def _initialize(self):
+        super(MonitoringDebugger, self)._initialize()
+        self._botframe = None
+        self._visible_frames = set()
+        self._enabled_codes = set()
+        self._line_tables = {}  # code -> {instruction offset: line}
+
+    def trigger(self, event, *args, **kwargs):
+        try:
+            return super(MonitoringDebugger, self).trigger(
+                event, *args, **kwargs
+            )
+        except BaseException:
+            # Unlike `sys.settrace`, failing callbacks don't stop monitoring
+            self._done = True
+            raise
+
+    # sys.monitoring callbacks
+    def _on_start(self, code, instruction_offset):
+        if code.co_filename != SCRIPT_FILENAME:
+            return monitoring.DISABLE
+
+        return self._enter_block(sys._getframe(1))
+
+    def _enter_block(self, frame):
+        if self._done:
+            return
+
+        code = frame.f_code
+        if frame.f_back is self._botframe:
+            self._enable_code(code)
+            self._visible_frames.add(frame)
+            return  # Module frame of script
+
+        if self.is_opaque_code(code):
+            return monitoring.DISABLE
+
+        if frame.f_back not in self._visible_frames:
+            return  # Called from an untraced frame
+
+        self._enable_code(code)
+        self._visible_frames.add(frame)
+
+        snapshot = FrameSnapshot(frame)
+        try:
+            args = self._extract_passed_arguments(snapshot)
+        except BaseException:
+            self._done = True
+            raise
+
+        self.trigger(DebuggerEvent.EnterBlock, frame=frame, snapshot=snapshot,
+                     arguments=args)
+
+    def _on_line(self, code, line_number):
+        self._step_line(sys._getframe(1))
+
+    def _step_line(self, frame):
+        if self._done or frame not in self._visible_frames:
+            return
+
+        self._excep_logged = False
+        self.trigger(DebuggerEvent.StepLine, frame=frame)
+
+    def _on_jump(self, code, instruction_offset, destination_offset):
+        if destination_offset > instruction_offset:
+            return monitoring.DISABLE  # Forward jumps are never reported
+
+        lines = self._get_line_table(code)
+        line = lines.get(destination_offset)
+        if line is None or line != lines.get(instruction_offset):
+            return  # Jumps to another line are reported by `LINE` event
+
+        self._step_line(sys._getframe(1))
+
+    def _get_line_table(self, code):
+        lines = self._line_tables.get(code)
+        if lines is None:
+            lines = self._line_tables[code] = {}
+            for start, end, line in code.co_lines():
+                for offset in range(start, end, 2):
+                    lines[offset] = line
+
+        return lines
+
+    def _on_return(self, code, instruction_offset, value):
+        self._exit_block(sys._getframe(1), value)
+
+    def _on_unwind(self, code, instruction_offset, exception):
+        if code.co_filename != SCRIPT_FILENAME:
+            return
+
+        self._exit_block(sys._getframe(1), None)
+
+    def _exit_block(self, frame, value):
+        if self._done or frame not in self._visible_frames:
+            return
+
+        self._visible_frames.discard(frame)
+        self.trigger(DebuggerEvent.ExitBlock, frame=frame, return_value=value)
+
+    def _on_raise(self, code, instruction_offset, exception):
+        if code.co_filename != SCRIPT_FILENAME:
+            return
+
+        self._raise(sys._getframe(1), exception)
+
+    def _on_throw(self, code, instruction_offset, exception):
+        """
+        Exception thrown into a generator resumes it, i.e. `GeneratorExit`
+        of a generator closed before being exhausted. Exception itself is
+        reported by the `RAISE` event which follows.
+        """
+        if code.co_filename != SCRIPT_FILENAME:
+            return
+
+        self._enter_block(sys._getframe(1))
+
+    def _raise(self, frame, exception):
+        if self._done or frame not in self._visible_frames:
+            return
+
+        self._excep_logged = True
+        self.trigger(DebuggerEvent.Exception, frame=frame,
+                     ex_type=type(exception), value=exception,
+                     traceback=exception.__traceback__)
+
+    def _enable_code(self, code):
+        if code in self._enabled_codes:
+            return
+
+        events = monitoring.events
+        monitoring.set_local_events(
+            self._tool_id, code,
+            events.LINE | events.JUMP | events.BRANCH | events.PY_RETURN |
+            events.PY_YIELD | events.PY_RESUME
+        )
+        self._enabled_codes.add(code)
+
+    def _callbacks(self):
+        events = monitoring.events
+        return {
+            events.PY_START: self._on_start,
+            events.PY_RESUME: self._on_start,
+            events.LINE: self._on_line,
+            events.JUMP: self._on_jump,
+            events.BRANCH: self._on_jump,
+            events.PY_RETURN: self._on_return,
+            events.PY_YIELD: self._on_return,
+            events.PY_UNWIND: self._on_unwind,
+            events.PY_THROW: self._on_throw,
+            events.RAISE: self._on_raise,
+        }
+
+    def _acquire_tool(self):
+        tool_ids = [monitoring.DEBUGGER_ID] + [
+            e for e in range(6) if e != monitoring.DEBUGGER_ID
+        ]
+
+        for tool_id in tool_ids:
+            if monitoring.get_tool(tool_id) is None:
+                monitoring.use_tool_id(tool_id, "pytrace")
+                self._tool_id = tool_id
+                break
+        else:
+            raise RuntimeError("No free sys.monitoring tool id available")
+
+        for event, callback in self._callbacks().items():
+            monitoring.register_callback(tool_id, event, callback)
+
+        events = monitoring.events
+        monitoring.set_events(
+            tool_id,
+            events.PY_START | events.PY_UNWIND | events.PY_THROW | events.RAISE
+        )
+
+    def _release_tool(self):
+        tool_id, self._tool_id = self._tool_id, None
+        monitoring.set_events(tool_id, 0)
+
+        for code in self._enabled_codes:
+            monitoring.set_local_events(tool_id, code, 0)
+
+        for event in self._callbacks():
+            monitoring.register_callback(tool_id, event, None)
+
+        monitoring.free_tool_id(tool_id)
+
+    def _execute_code(self, code, user_globals, user_locals):
+        self._acquire_tool()
+        self._botframe = sys._getframe()
+        try:
+            exec(code, user_globals, user_locals)
+        finally:
+            self._release_tool()
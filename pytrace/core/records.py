@@ -0,0 +1,147 @@
+"""
+Compact records of recorded steps, stack frames and heap entries.
+"""
+
+
+class Record(object):
+    """
+    Record with a fixed set of fields stored in `__slots__`. Fields are
+    also accessible by their JSON keys like a dict, where unset fields are
+    treated as missing keys.
+    """
+
+    __slots__ = ()
+
+    # JSON keys of fields whose attribute name differs
+    aliases = {}
+
+    def __init__(self, **fields):
+        for attr, value in fields.items():
+            setattr(self, attr, value)
+
+    @classmethod
+    def _get_attribute(cls, key):
+        attr = cls.aliases.get(key, key)
+        if attr not in cls.__slots__:
+            raise KeyError(key)
+
+        return attr
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self._get_attribute(key))
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        setattr(self, self._get_attribute(key), value)
+
+    def __delitem__(self, key):
+        try:
+            delattr(self, self._get_attribute(key))
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            return hasattr(self, self._get_attribute(key))
+        except KeyError:
+            return False
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, default=None):
+        value = self.get(key, default)
+        if key in self:
+            del self[key]
+
+        return value
+
+    def keys(self):
+        json_keys = self._json_keys
+        return [
+            json_keys.get(attr, attr) for attr in self.__slots__
+            if hasattr(self, attr)
+        ]
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def copy(self):
+        record = type(self)()
+        for attr in self.__slots__:
+            if hasattr(self, attr):
+                setattr(record, attr, getattr(self, attr))
+
+        return record
+
+    def to_json(self):
+        return dict(self.items())
+
+    def __setstate__(self, state):
+        """
+        Restores fields pickled as (None, {attribute: value}), which is
+        how `__slots__` are pickled by default
+        """
+        for attr, value in state[1].items():
+            setattr(self, attr, value)
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, dict)):
+            return self.to_json() == dict(other.items())
+
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self.to_json())
+
+
+class Step(Record):
+    "Recorded step of a trace"
+
+    __slots__ = (
+        'name', 'stack', 'heap', 'globals', 'output_offset', 'event',
+        'event_data', 'line_number', 'delta', 'refs', 'output', 'values',
+        'instances', 'shapes'
+    )
+
+    aliases = {
+        'outputOffset': 'output_offset',
+        'eventData': 'event_data',
+        'lineNumber': 'line_number'
+    }
+
+
+class StackFrame(Record):
+    "Encoded frame within stack of a step"
+
+    __slots__ = ('name', 'locals', 'uid')
+
+
+class HeapEntry(Record):
+    "Encoded object stored within heap"
+
+    __slots__ = ('name', 'type', 'value')
+
+
+# Reverse lookup of aliases
+for _record_class in (Record, Step, StackFrame, HeapEntry):
+    _record_class._json_keys = {
+        attr: key for key, attr in _record_class.aliases.items()
+    }
@@ -2,8 +2,9 @@
 Python Sandbox
 """
 import sys
+from contextlib import contextmanager
 from collections import deque as Queue
-from six import StringIO, exec_
+from six import exec_
 
 from pytrace.conf import settings
 from pytrace.core.builtins import builtins
@@ -13,6 +14,64 @@ def default_runner(script, user_globals, user_locals):
     exec_(script, user_globals, user_locals)
 
 
+class OutputBuffer(object):
+    """
+    Append-only replacement of `StringIO` for captured output streams.
+
+    Written chunks are only joined when complete value is requested and
+    length of the output is tracked on every write, so recording output
+    offset on each step is cheap.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._length = 0
+
+    def write(self, value):
+        if value:
+            self._chunks.append(value)
+            self._length += len(value)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+    def tell(self):
+        return self._length
+
+    def getvalue(self):
+        if len(self._chunks) > 1:
+            self._chunks = [''.join(self._chunks)]
+
+        return self._chunks[0] if self._chunks else ''
+
+    def tail(self, offset):
+        "Returns output written after `offset`"
+        chunks = []
+        remaining = self._length - offset
+
+        for chunk in reversed(self._chunks):
+            if remaining <= 0:
+                break
+
+            if len(chunk) > remaining:
+                chunk = chunk[-remaining:]
+
+            chunks.append(chunk)
+            remaining -= len(chunk)
+
+        return ''.join(reversed(chunks))
+
+    def __len__(self):
+        return self._length
+
+
 class Sandbox(object):
     """
     Restricts execution of unsafe code and manages output streams
@@ -30,14 +89,9 @@ class Sandbox(object):
 
         self._stdout = None
         if settings.REDIRECT_STDERR or settings.REDIRECT_STDOUT:
-            self._stdout = StringIO()
-
-        if settings.REDIRECT_STDOUT:
-            sys.stdout = self._stdout
-
-        if settings.REDIRECT_STDERR:
-            sys.stderr = self._stdout
+            self._stdout = OutputBuffer()
 
+        self._redirect_streams()
         settings.INPUT_QUEUE = Queue(inputs)
         self._locals = {
             '__name__': '__pytrace__',
@@ -49,10 +103,40 @@ class Sandbox(object):
         if settings.REDIRECT_STDERR or settings.REDIRECT_STDOUT:
             return self._stdout.getvalue()
 
+    @property
+    def stdout_offset(self):
+        "Length of the output captured so far"
+        if settings.REDIRECT_STDERR or settings.REDIRECT_STDOUT:
+            return self._stdout.tell()
+
+    def stdout_since(self, offset):
+        "Output captured after specified offset"
+        if settings.REDIRECT_STDERR or settings.REDIRECT_STDOUT:
+            return self._stdout.tail(offset)
+
+    def _redirect_streams(self):
+        if settings.REDIRECT_STDOUT:
+            sys.stdout = self._stdout
+
+        if settings.REDIRECT_STDERR:
+            sys.stderr = self._stdout
+
     def _finalizer(self):
         sys.stdout = self._raw_stdout
         sys.stderr = self._raw_stderr
 
+    @contextmanager
+    def suspended(self):
+        """
+        Temporarily restores actual output streams while script execution
+        is paused
+        """
+        self._finalizer()
+        try:
+            yield
+        finally:
+            self._redirect_streams()
+
     def run(self, script, input_queue=None, runner=None):
         if runner is None:
             runner = default_runner
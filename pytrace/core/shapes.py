@@ -0,0 +1,103 @@
+"""
+Shape (columnar) encoding of encoded instances.
+
+Instances of the same class having the same attributes share a shape, which
+holds their name, type, class and attribute names. Heap entries of these
+instances are then stored as rows holding their heap id followed by values
+of their attributes, in order of attribute names of their shape.
+"""
+
+INSTANCE_KEYS = frozenset(('class', 'attributes'))
+
+
+def is_instance_value(value):
+    "Returns True if `value` is encoded value of an instance"
+    return type(value) is dict and len(value) == 2 and \
+        INSTANCE_KEYS.issuperset(value)
+
+
+class ShapeTable(object):
+    """
+    Stores every distinct shape of instances once. Shapes are referenced
+    by their index within `shapes`.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._indices = {}  # shape key -> index
+        self.shapes = []
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def index(self, entry):
+        "Returns index of shape of encoded instance `entry` (a `HeapEntry`)"
+        value = entry.value
+        entry_type = entry.type
+        attributes = tuple(value['attributes'])
+
+        key = (value['class'], attributes, entry.name, entry_type['name'],
+               entry_type['module'])
+
+        index = self._indices.get(key)
+        if index is None:
+            index = self._indices[key] = len(self.shapes)
+            self.shapes.append({
+                'name': entry.name,
+                'type': entry_type,
+                'class': value['class'],
+                'attributes': list(attributes)
+            })
+
+        return index
+
+
+def encode_heap(heap, table):
+    """
+    Splits recorded `heap` into entries which aren't instances and
+    instances grouped by their shape in `table`. Instances are returned as
+    list of `[shape, rows]` pairs.
+    """
+    entries = {}
+    groups = {}
+    index = table.index
+
+    for key, entry in heap.items():
+        value = entry.value
+        if not is_instance_value(value):
+            entries[key] = entry
+            continue
+
+        row = [key]
+        row.extend(value['attributes'].values())
+
+        shape = index(entry)
+        rows = groups.get(shape)
+        if rows is None:
+            rows = groups[shape] = []
+
+        rows.append(row)
+
+    return entries, [[shape, groups[shape]] for shape in sorted(groups)]
+
+
+def decode_heap(heap, instances, shapes):
+    "Returns `heap` along with entries of shape encoded `instances`"
+    heap = dict(heap)
+    for shape_index, rows in instances:
+        shape = shapes[shape_index]
+        names = shape['attributes']
+
+        for row in rows:
+            heap[row[0]] = {
+                'name': shape['name'],
+                'type': shape['type'],
+                'value': {
+                    'class': shape['class'],
+                    'attributes': dict(zip(names, row[1:]))
+                }
+            }
+
+    return heap
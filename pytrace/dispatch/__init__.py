@@ -134,10 +134,10 @@ class Signal(object):
                 a receiver. This will usually be a string, though it may be
                 anything hashable.
         """
-        from django.conf import settings
+        from pytrace.conf import settings
 
         # If DEBUG is on, check that we got a good receiver
-        if settings.configured and settings.DEBUG:
+        if settings.DEBUG:
             assert callable(receiver), "Signal receivers must be callable."
 
             # Check for **kwargs
@@ -3,6 +3,13 @@ from __future__ import absolute_import
 import json
 from enum import Enum
 
+from pytrace.core.debugger import DebuggerEvent
+
+
+# Names of debugger events looked up directly while streaming steps, so
+# encoder don't need to fall back to `JsonEncoder.default` for every step
+EVENT_NAMES = {e: e.name for e in DebuggerEvent}
+
 
 class JsonEncoder(json.JSONEncoder):
 
@@ -19,3 +26,76 @@ class JsonEncoder(json.JSONEncoder):
 
 def dumps(o, *args, **kwargs):
     return json.dumps(o, cls=JsonEncoder, *args, **kwargs)
+
+
+def _encode_event(step):
+    event = step.get('event')
+    if event in EVENT_NAMES:
+        step = step.copy()
+        step['event'] = EVENT_NAMES[event]
+
+    return step
+
+
+def dump_stream(trace, fileobj, **kwargs):
+    """
+    Writes trace as newline delimited JSON to `fileobj`. First line
+    holds `scriptLines`, `refs` and `output` (when available) and every
+    following line holds a single step.
+
+    `trace` can either be a complete trace as returned by `pytrace.trace`
+    or an iterable of steps i.e. `pytrace.iter_trace`, in which case every
+    step is written as soon as it is produced.
+    """
+    kwargs.setdefault('separators', (',', ':'))
+    encoder = JsonEncoder(**kwargs)
+
+    if isinstance(trace, dict):
+        header = {k: v for k, v in trace.items() if k != 'steps'}
+        steps = trace['steps']
+    else:
+        header = {
+            'scriptLines': getattr(trace, 'script_lines', []),
+            'refs': {}
+        }
+        steps = trace
+
+    fileobj.write(encoder.encode(header))
+    fileobj.write('\n')
+
+    for step in steps:
+        fileobj.write(encoder.encode(_encode_event(step)))
+        fileobj.write('\n')
+
+
+def load_stream(fileobj):
+    """
+    Reads newline delimited JSON written by `dump_stream` and returns
+    complete trace. Constants, interned values, shapes and output streamed
+    along with steps are merged into `refs`, `values`, `shapes` and `output`
+    of the trace.
+    """
+    lines = iter(fileobj)
+    trace = json.loads(next(lines))
+    trace['steps'] = steps = []
+
+    output = [trace.get('output', '')]
+    for line in lines:
+        if not line.strip():
+            continue
+
+        step = json.loads(line)
+        trace['refs'].update(step.get('refs', {}))
+        if 'values' in step:
+            trace.setdefault('values', []).extend(step['values'])
+
+        if 'shapes' in step:
+            trace.setdefault('shapes', []).extend(step['shapes'])
+
+        if 'output' in step:
+            output.append(step['output'])
+
+        steps.append(step)
+
+    trace['output'] = ''.join(output)
+    return trace
@@ -0,0 +1,131 @@
+"""
+Serializers for `array.array` and NumPy arrays (when NumPy is installed).
+
+Elements of these arrays don't exist as objects until they are accessed, so
+numeric arrays are always encoded as typed arrays. Rest of the arrays are
+encoded same as objects without any registered serializer.
+"""
+
+import array
+from abc import abstractmethod
+
+from pytrace.conf import settings
+
+from .registry import default as registry
+from .base import AbstractSerializer
+from .collections import encode_typed, is_finite
+from .fallback import FallbackSerializer
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+ARRAY_DTYPES = dict(
+    [(e, 'int') for e in 'bBhHiIlLqQ'] + [(e, 'float') for e in 'fd']
+)
+
+
+class AbstractArraySerializer(AbstractSerializer):
+    """
+    Base class of array serializers. Only first `MAX_COLLECTION_ELEMENTS`
+    elements of arrays are encoded.
+    """
+
+    def get_length(self, value):
+        return len(value)
+
+    @abstractmethod
+    def get_elements(self, value, max_elements):
+        "Returns flat array of elements to be encoded"
+        pass
+
+    @abstractmethod
+    def get_dtype(self, elements):
+        pass
+
+    @abstractmethod
+    def get_key(self, value, elements):
+        "Returns comparable key of encoded `elements` of `value`"
+        pass
+
+    def get_fallback(self):
+        return registry.get_instance(FallbackSerializer)
+
+    def get_fingerprint(self, value):
+        elements = self.get_elements(value, settings.MAX_COLLECTION_ELEMENTS)
+        if self.get_dtype(elements) is None:
+            return self.get_fallback().get_fingerprint(value)
+
+        return (self.get_length(value), self.get_key(value, elements)), ()
+
+    def encode(self, value, context):
+        elements = self.get_elements(value, context.max_elements)
+        dtype = self.get_dtype(elements)
+        if dtype is None:
+            return self.get_fallback().encode(value, context)
+
+        return self.encode_elements(value, elements, dtype, context)
+
+    def encode_elements(self, value, elements, dtype, context):
+        encoded_value = encode_typed(dtype, elements.tolist())
+        length = self.get_length(value)
+        if len(elements) < length:
+            encoded_value.update(context.truncated(value, length=length))
+
+        return encoded_value
+
+
+@registry.register_class(array.array)
+class ArraySerializer(AbstractArraySerializer):
+
+    def get_elements(self, value, max_elements):
+        return value[:max_elements] if max_elements is not None else value
+
+    def get_dtype(self, elements):
+        dtype = ARRAY_DTYPES.get(elements.typecode)
+        if dtype == 'float' and not all(map(is_finite, elements)):
+            return None
+
+        return dtype
+
+    def get_key(self, value, elements):
+        to_bytes = getattr(elements, 'tobytes', None) or elements.tostring
+        return elements.typecode, to_bytes()
+
+
+if numpy is not None:
+
+    NUMPY_DTYPES = {'b': 'bool', 'i': 'int', 'u': 'int', 'f': 'float'}
+
+    @registry.register_class(numpy.ndarray)
+    class NumpyArraySerializer(AbstractArraySerializer):
+        """
+        Serializer for NumPy arrays. Arrays are flattened and their shape
+        is recorded along with their elements.
+        """
+
+        def get_length(self, value):
+            return value.size
+
+        def get_elements(self, value, max_elements):
+            elements = value.ravel()
+            return elements[:max_elements] if max_elements is not None \
+                else elements
+
+        def get_dtype(self, elements):
+            dtype = NUMPY_DTYPES.get(elements.dtype.kind)
+            if dtype == 'float' and not numpy.isfinite(elements).all():
+                return None
+
+            return dtype
+
+        def get_key(self, value, elements):
+            return str(elements.dtype), value.shape, elements.tobytes()
+
+        def encode_elements(self, value, elements, dtype, context):
+            encoded_value = super(NumpyArraySerializer, self). \
+                encode_elements(value, elements, dtype, context)
+            encoded_value['shape'] = list(value.shape)
+            return encoded_value
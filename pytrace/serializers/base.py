@@ -2,8 +2,10 @@ import sys
 from abc import abstractmethod
 import six
 
+from pytrace.conf import settings
 from pytrace.core.exceptions import NoSerializerFoundError, SerializationError
-from pytrace.core.heap import Heap
+from pytrace.core.heap import Heap, PersistentHeap
+from pytrace.core.records import HeapEntry
 
 
 from .utils import get_object_name
@@ -12,47 +14,127 @@ from .registry import default as serializers_registry
 
 class AbstractSerializer(object):
     """
-    Base class for all serializers
+    Base class for all serializers. Serializers are stateless, the only
+    instance of each is shared by every `ObjectSerializer` which passes
+    itself as `context` of encoding.
     """
 
-    def __init__(self, parent=None):
-        if parent:
-            assert isinstance(parent, ObjectSerializer)
-
-        self.parent = parent
-
     def encode_type(self, type_):
         return {
             'name': type_.__name__,
             'module': type_.__module__
         }
 
-    def serialize(self, obj):
-        return {
-            'name': get_object_name(obj),
-            'type': self.encode_type(type(obj)),
-            'value': self.encode(obj)
-        }
-
-    def serialize_inner(self, value):
-        assert self.parent, "serialize_inner cannot be called from outside context"
-        return self.parent.encode(value)
+    def serialize(self, obj, context):
+        return HeapEntry(
+            name=get_object_name(obj),
+            type=self.encode_type(type(obj)),
+            value=self.encode(obj, context)
+        )
+
+    def get_fingerprint(self, value):
+        """
+        Returns a cheap summary of `value` as pair of a comparable key and
+        list of objects referenced by its encoded value. It's used to tell
+        whether `value` changed since it was last encoded. Returns None if
+        that can't be told without encoding `value` again.
+        """
+        return None
+
+    def serialize_truncated(self, obj, context):
+        """
+        Returns heap entry of `obj` holding a truncation marker instead of
+        its encoded value. Used once encoding budget of a step is exhausted.
+        """
+        return HeapEntry(
+            name=get_object_name(obj),
+            type=self.encode_type(type(obj)),
+            value=context.truncated(obj)
+        )
+
+    def serialize_inner(self, value, context):
+        return context.encode(value)
+
+    def encode_repr(self, value, context):
+        "Returns repr of `value`, truncated to `MAX_REPR_LENGTH`"
+        text = repr(value)
+        max_length = context.max_repr_length
+        if max_length is None or len(text) <= max_length:
+            return text
+
+        marker = context.truncated(value, length=len(text))
+        marker['repr'] = text[:max_length]
+        return marker
 
     @abstractmethod
-    def encode(self, obj):
+    def encode(self, obj, context):
         pass
 
 
 class ObjectSerializer(object):
+    """
+    Encodes objects into heap. If `values` table is specified, encoded
+    values are interned before being stored, so identical encoded values
+    are shared instead of being stored again.
+
+    Encoding of a step is bounded by `MAX_ENCODING_DEPTH`, `MAX_HEAP_ENTRIES`,
+    `MAX_COLLECTION_ELEMENTS` and `MAX_REPR_LENGTH` settings. Whatever goes
+    beyond these is replaced by a truncation marker holding heap id of the
+    object, i.e. `{'truncated': id}`. If `max_depth` is specified it's used
+    instead of `MAX_ENCODING_DEPTH`.
+
+    While a step is being recorded, `snapshot` holds `FrameSnapshot` of its
+    event, so serializers can use it without reading frame again.
+    """
+
+    heap_class = Heap
 
-    def __init__(self):
-        self.heap = Heap()
+    def __init__(self, values=None, max_depth=None):
+        self.heap = self.heap_class()
+        self.values = values
+        self._max_depth = max_depth
         self.reset()
 
     def reset(self):
         self._buffer = {}
+        self._ancestors = set()
+        self._depth = 0
+        self._entries_count = 0
+        self.snapshot = None
         self.heap.reset()
 
+        self.max_depth = self._max_depth
+        if self.max_depth is None:
+            self.max_depth = settings.MAX_ENCODING_DEPTH
+
+        self.max_entries = settings.MAX_HEAP_ENTRIES
+        self.max_elements = settings.MAX_COLLECTION_ELEMENTS
+        self.max_repr_length = settings.MAX_REPR_LENGTH
+
+    def is_over_budget(self):
+        "Returns True if no more objects can be encoded in current step"
+        return (self.max_depth is not None and
+                self._depth >= self.max_depth) or \
+            (self.max_entries is not None and
+             self._entries_count >= self.max_entries)
+
+    def truncated(self, value, **details):
+        "Returns truncation marker of `value` along with specified details"
+        marker = {'truncated': self.heap.get_id(value)}
+        marker.update(details)
+        return marker
+
+    def enter(self, value):
+        "Marks `value` as being encoded, until `leave` is called"
+        self._ancestors.add(id(value))
+
+    def leave(self, value):
+        self._ancestors.discard(id(value))
+
+    def is_encoding(self, value):
+        "Returns True if `value` is being encoded i.e. referenced by itself"
+        return id(value) in self._ancestors
+
     def get_object_by_id(self, id_):
         return self.heap[id_]
 
@@ -62,26 +144,102 @@ class ObjectSerializer(object):
     def _cached_encoded_value(self, original):
         return self._buffer.get(id(original), None)
 
-    def encode_using(self, value, serializer_class):
+    def encode_using(self, value, serializer):
+        self._entries_count += 1
+        self._depth += 1
+        self.enter(value)
         try:
-            serializer = serializer_class(parent=self)
-            encoded_value = serializer.serialize(value)
+            encoded_value = serializer.serialize(value, self)
+            if self.values is not None:
+                encoded_value = self.values.intern(encoded_value)
+
             self._cache(value, encoded_value)
             return encoded_value
         except NoSerializerFoundError:
             raise
         except Exception as ex:
             _, _, tb = sys.exc_info()
-            six.reraise(SerializationError, (serializer_class, value, ex), tb)
+            six.reraise(SerializationError, (type(serializer), value, ex), tb)
+        finally:
+            self.leave(value)
+            self._depth -= 1
 
     def encode(self, value):
         value_type = type(value)
         encoded_value = self._cached_encoded_value(value)
-        if not encoded_value:  # If in cache, don't serialize again
-            serializer = serializers_registry.get(value_type)
+        if encoded_value is None:  # If in cache, don't serialize again
+            if self.is_encoding(value):
+                return self.heap.get_id(value)  # Stored once encoded
+
+            serializer = serializers_registry.resolve(value_type)
             if serializer is None:
                 raise NoSerializerFoundError(value_type)
 
-            encoded_value = self.encode_using(value, serializer)
+            if self.is_over_budget():
+                encoded_value = serializer.serialize_truncated(value, self)
+            else:
+                encoded_value = self.encode_using(value, serializer)
 
         return self.heap.store(encoded_value, actual_value=value)
+
+
+class PersistentObjectSerializer(ObjectSerializer):
+    """
+    Object serializer keeping encoded objects in heap across steps. Objects
+    are only encoded again if their fingerprint changed, otherwise only the
+    objects they reference are visited.
+    """
+
+    heap_class = PersistentHeap
+
+    def get_fingerprint(self, value, serializer):
+        try:
+            fingerprint = serializer.get_fingerprint(value)
+        except Exception:
+            return None, ()  # Let serializer report the error
+
+        if fingerprint is None:
+            return None, ()
+
+        key, references = fingerprint
+        ids = tuple(id(e) for e in references)
+        return (type(value), key, ids), references
+
+    def encode(self, value):
+        if self._cached_encoded_value(value) is not None:
+            return super(PersistentObjectSerializer, self).encode(value)
+
+        if self.is_encoding(value):
+            return self.heap.get_id(value)  # Stored once encoded
+
+        fake_id = self.heap.retain_constant(value)
+        if fake_id is not None:
+            return fake_id
+
+        value_type = type(value)
+        serializer = serializers_registry.resolve(value_type)
+        if serializer is None:
+            raise NoSerializerFoundError(value_type)
+
+        if self.is_over_budget():
+            encoded_value = serializer.serialize_truncated(value, self)
+            return self.heap.store(encoded_value, actual_value=value)
+
+        fingerprint, references = self.get_fingerprint(value, serializer)
+        if fingerprint is not None:
+            fake_id = self.heap.retain(value, fingerprint)
+            if fake_id is not None:
+                self._cache(value, self.heap[fake_id])
+                self._entries_count += 1
+                self._depth += 1
+                try:
+                    for reference in references:
+                        self.encode(reference)
+                finally:
+                    self._depth -= 1
+
+                return fake_id
+
+        encoded_value = self.encode_using(value, serializer)
+        return self.heap.store(encoded_value, actual_value=value,
+                               fingerprint=fingerprint)
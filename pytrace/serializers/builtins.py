@@ -1,10 +1,13 @@
 import inspect
 import types
+import weakref
 from abc import abstractmethod
 import six
 
 from pytrace.conf import settings
 from pytrace import compat
+from pytrace.core.codeinfo import get_code_info
+from pytrace.core.heap import is_constant
 
 from .registry import default as registry
 from .base import AbstractSerializer
@@ -17,50 +20,68 @@ class PremitiveTypeSerializer(AbstractSerializer):
     This will simply invokes object.__repr__
     """
 
-    def encode(self, value):
-        return repr(value)
+    def serialize_truncated(self, obj, context):
+        return self.serialize(obj, context)  # Nothing to leave out
 
+    def encode(self, value, context):
+        return self.encode_repr(value, context)
 
-@registry.register_class(compat.TypeType)
+    def get_fingerprint(self, value):
+        if is_constant(type(value)):
+            return (), ()
+
+
+@registry.register_class(compat.TypeType, subclasses=False)
 class TypeSerializer(AbstractSerializer):
     """
-    Serializer for type`
+    Serializer for type`. Classes of other metaclasses are left for
+    `ClassSerializer` through fallback.
     """
 
-    def encode(self, value):
+    def encode(self, value, context):
         return {
             'name': value.__name__,
             'module': value.__module__
         }
 
-    serialize = encode 
+    serialize = serialize_truncated = encode
+
+    def get_fingerprint(self, value):
+        return (value.__name__, value.__module__), ()
 
 
 @registry.register_class(types.FunctionType)
 class FunctionSerializer(AbstractSerializer):
 
     def get_arguments(self, obj):
-        argspec = inspect.getargspec(obj)
+        info = get_code_info(compat.get_func_code(obj))
 
         return {
-            'args': list(argspec.args),
-            'varargs': argspec.varargs,
-            'keywords': argspec.keywords
+            'args': list(info.args),
+            'varargs': info.varargs,
+            'keywords': info.keywords,
+            'kwonlyargs': list(info.kwonlyargs)
         }
 
-    def get_parent(self, func):
-        if hasattr(func, '__parent__') and func.__parent__ is not None:
-            return self.serialize_inner(func.__parent__)
+    def get_parent(self, func, context):
+        parent = get_code_info(compat.get_func_code(func)).parent
+        if parent is not None:
+            return self.serialize_inner(parent, context)
+
+    def get_fingerprint(self, value):
+        code = compat.get_func_code(value)
+        parent = get_code_info(code).parent
+        key = (id(code), id(value.__doc__))
+        return key, [parent] if parent is not None else []
 
-    def encode(self, value):
-        is_lambda = compat.is_lambda(value)
-        func_code = compat.get_func_code(value)
+    def encode(self, value, context):
+        info = get_code_info(compat.get_func_code(value))
 
         return {
             'arguments': self.get_arguments(value),
-            'isLambda': is_lambda,
-            'lineno': func_code.co_firstlineno,
-            'parent': self.get_parent(value),
+            'isLambda': info.is_lambda,
+            'lineno': info.first_line,
+            'parent': self.get_parent(value, context),
             'help': value.__doc__ if hasattr(value, '__doc__') else None
         }
 
@@ -71,12 +92,16 @@ class MethodSerializer(FunctionSerializer):
     Serializer for method or class bound functions
     """
 
-    def encode(self, value):
-        encoded_value = super(MethodSerializer, self).encode(value)
+    def encode(self, value, context):
+        encoded_value = super(MethodSerializer, self).encode(value, context)
         owner_class = compat.get_im_class(value)
-        encoded_value['class'] = self.serialize_inner(owner_class)
+        encoded_value['class'] = self.serialize_inner(owner_class, context)
         return encoded_value
 
+    def get_fingerprint(self, value):
+        key, references = super(MethodSerializer, self).get_fingerprint(value)
+        return key, references + [compat.get_im_class(value)]
+
 
 @registry.register_class(types.BuiltinFunctionType, types.BuiltinMethodType)
 class BuiltinFunctionSerializer(AbstractSerializer):
@@ -84,16 +109,50 @@ class BuiltinFunctionSerializer(AbstractSerializer):
     Serializer for builtin function and builtin bounded functions or methods
     """
 
-    def encode(self, value):
+    def encode(self, value, context):
         return {
             'help': value.__doc__ if hasattr(value, '__doc__') else None
         }
 
+    def get_fingerprint(self, value):
+        return (), ()
+
+
+def get_slots(cls):
+    """
+    Returns names of all the attributes declared in `__slots__` of `cls`
+    and its bases, with private names mangled
+    """
+    names = []
+    for klass in inspect.getmro(cls):
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, six.string_types):
+            slots = (slots, )
+
+        for name in slots:
+            if name in ('__dict__', '__weakref__'):
+                continue
+
+            if name.startswith('__') and not name.endswith('__'):
+                name = '_%s%s' % (klass.__name__.lstrip('_'), name)
+
+            names.append(name)
+
+    return names
+
 
 class AttributeSerializer(AbstractSerializer):
+    """
+    Base class of serializers encoding attributes of objects. Sorted and
+    filtered names of attributes (layout) are computed once per owner
+    and set of names within `__dict__` of object.
+    """
+
+    def __init__(self):
+        self._layouts = weakref.WeakKeyDictionary()
 
     @abstractmethod
-    def encode(self, value):
+    def encode(self, value, context):
         pass
 
     def filter_attributes(self, dctx):
@@ -102,50 +161,115 @@ class AttributeSerializer(AbstractSerializer):
             if not e.startswith('__')
         ])
 
-    def encode_attributes(self, value):
-        attrs = {}
-
-        if hasattr(value, '__dict__'):
-            for atr in self.filter_attributes(value.__dict__):
-                attrValue = getattr(value, atr)
-                attrs[atr] = self.serialize_inner(attrValue)
+    def get_layout_owner(self, value):
+        "Returns object layouts of `value` are cached against"
+        return value
+
+    def get_slots(self, owner):
+        "Returns names of attributes stored in `__slots__` of `owner`"
+        return ()
+
+    def get_layout(self, value):
+        owner = self.get_layout_owner(value)
+        names = tuple(getattr(value, '__dict__', None) or ())
+
+        try:
+            layouts = self._layouts[owner]
+        except KeyError:
+            layouts = self._layouts[owner] = {}
+
+        try:
+            return layouts[names]
+        except KeyError:
+            layout = layouts[names] = tuple(self.filter_attributes(
+                set(names).union(self.get_slots(owner))
+            ))
+            return layout
+
+    def get_attributes(self, value):
+        """
+        Returns names of attributes of `value` in order along with their
+        values. Unset slots are skipped.
+        """
+        names, values = [], []
+        for name in self.get_layout(value):
+            try:
+                attr_value = getattr(value, name)
+            except AttributeError:
+                continue
+
+            names.append(name)
+            values.append(attr_value)
+
+        return names, values
+
+    def encode_attributes(self, value, context):
+        names, values = self.get_attributes(value)
+        return {
+            name: self.serialize_inner(attr_value, context)
+            for name, attr_value in zip(names, values)
+        }
 
-        return attrs
+    def get_attributes_fingerprint(self, value):
+        names, values = self.get_attributes(value)
+        return tuple(names), values
 
 
 @registry.register_class(types.ModuleType)
 class ModuleSerializer(AttributeSerializer):
 
-    def encode(self, value):
+    def encode(self, value, context):
         return {
             'version': str(getattr(value, '__version__', None) or ''),
             'package': str(getattr(value, '__package__', None) or ''),
-            'attributes': self.encode_attributes(value)
+            'attributes': self.encode_attributes(value, context)
         }
 
+    def get_fingerprint(self, value):
+        names, references = self.get_attributes_fingerprint(value)
+        key = (names, str(getattr(value, '__version__', None) or ''),
+               str(getattr(value, '__package__', None) or ''))
+        return key, references
+
 
 class ClassSerializer(AttributeSerializer):
 
-    def encode(self, value):
+    def encode(self, value, context):
         return {
             'super': [
-                self.serialize_inner(e)
+                self.serialize_inner(e, context)
                 for e in value.__bases__
                 if e is not object
             ],
-            'attributes': self.encode_attributes(value)
+            'attributes': self.encode_attributes(value, context)
         }
 
+    def get_fingerprint(self, value):
+        names, references = self.get_attributes_fingerprint(value)
+        bases = [e for e in value.__bases__ if e is not object]
+        return (names, len(bases)), bases + references
+
 
 class InstanceSerializer(AttributeSerializer):
 
-    def encode(self, value):
+    def get_layout_owner(self, value):
+        return value.__class__ if hasattr(value, '__class__') else type(value)
+
+    def get_slots(self, owner):
+        return get_slots(owner)
+
+    def encode(self, value, context):
         klass = value.__class__ if hasattr(value, '__class__') else type(value)
         return {
-            'class': self.serialize_inner(klass),
-            'attributes': self.encode_attributes(value)
+            'class': self.serialize_inner(klass, context),
+            'attributes': self.encode_attributes(value, context)
         }
 
+    def get_fingerprint(self, value):
+        klass = value.__class__ if hasattr(value, '__class__') else type(value)
+        names, references = self.get_attributes_fingerprint(value)
+        return names, [klass] + references
+
 if six.PY2:
     registry.register_class(types.ClassType)(ClassSerializer)
     registry.register_class(types.InstanceType)(InstanceSerializer)
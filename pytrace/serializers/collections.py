@@ -1,76 +1,160 @@
+import math
 from abc import abstractmethod
+from itertools import islice
+
+import six
+
+from pytrace.conf import settings
 
 from .registry import default as registry
 from .base import AbstractSerializer
 
 
-class AbstractCollectionSerializer(AbstractSerializer):
+# Names of numeric types whose collections can be encoded as typed arrays
+NUMERIC_DTYPES = {int: 'int', float: 'float', bool: 'bool'}
+if six.PY2:
+    NUMERIC_DTYPES[long] = 'int'  # NOQA
 
-    def __init__(self, *args, **kwargs):
-        super(AbstractCollectionSerializer, self).__init__(*args, **kwargs)
-        self.reset_parent_footprint()
 
-    def get_parent(self, item):
-        return self._parent_footprint.get(id(item), None)
+def is_finite(value):
+    return not (math.isinf(value) or math.isnan(value))
 
-    def set_parent(self, item, parent):
-        self._parent_footprint[id(item)] = parent
 
-    def reset_parent_footprint(self):
-        self._parent_footprint = {}
+def get_dtype(collection):
+    """
+    Returns name of numeric type shared by every element of `collection`,
+    or None if elements aren't numeric or of different types. Collections
+    of floats which aren't finite can't be written as JSON literals.
+    """
+    dtypes = set(NUMERIC_DTYPES.get(e) for e in set(map(type, collection)))
+    if len(dtypes) != 1:
+        return None
 
-    def is_self(self, collection, item):
-        while item is not None:
-            if collection == item:
-                return True
+    dtype = dtypes.pop()
+    if dtype == 'float' and not all(map(is_finite, collection)):
+        return None
 
-            item = self.get_parent(item)
+    return dtype
 
-        return False
 
-    def encode(self, value):
-        encoded_value = self.encode_collection(value)
-        self.reset_parent_footprint()
-        return encoded_value
+def encode_typed(dtype, values):
+    """
+    Returns typed array holding `values` as literals instead of references
+    to heap entries
+    """
+    return {
+        'dtype': dtype,
+        'values': list(values)
+    }
+
+
+class AbstractCollectionSerializer(AbstractSerializer):
+    """
+    Base class of collection serializers. Collection being encoded is
+    marked within context, so collections containing themselves can be
+    detected.
+    """
+
+    def encode(self, value, context):
+        context.enter(value)
+        try:
+            return self.encode_collection(value, context)
+        finally:
+            context.leave(value)
+
+    def get_elements(self, collection, max_elements):
+        """
+        Returns elements (keys of dicts) of `collection` to be encoded i.e.
+        only first `max_elements` of them
+        """
+        if max_elements is None or len(collection) <= max_elements:
+            return collection
+
+        return list(islice(collection, max_elements))
 
     @abstractmethod
-    def encode_collection(self, collection):
+    def encode_collection(self, collection, context):
         pass
 
 
 @registry.register_class(list, tuple, set)
 class CollectionSerializer(AbstractCollectionSerializer):
+    """
+    Serializer for lists, tuples and sets. Collections having at least
+    `TYPED_ARRAY_MIN_LENGTH` elements, all of the same numeric type, are
+    encoded as a typed array. Truncated collections end with a truncation
+    marker holding their length.
+    """
+
+    def get_dtype(self, collection, elements):
+        min_length = settings.TYPED_ARRAY_MIN_LENGTH
+        if min_length is None or len(collection) < min_length:
+            return None
+
+        return get_dtype(elements)
+
+    def encode_element(self, item, context):
+        if isinstance(item, list) and context.is_encoding(item):
+            return "[...]"
+
+        return self.serialize_inner(item, context)
+
+    def get_fingerprint(self, value):
+        elements = self.get_elements(value, settings.MAX_COLLECTION_ELEMENTS)
+        dtype = self.get_dtype(value, elements)
+        if dtype is not None:
+            return (dtype, len(value), tuple(elements)), ()
+
+        return len(value), list(elements)
+
+    def encode_collection(self, collection, context):
+        elements = self.get_elements(collection, context.max_elements)
+        dtype = self.get_dtype(collection, elements)
+        if dtype is not None:
+            encoded_value = encode_typed(dtype, elements)
+        else:
+            encoded_value = [
+                self.encode_element(item, context)
+                for item in elements
+            ]
+
+        if elements is not collection:
+            marker = context.truncated(collection, length=len(collection))
+            if dtype is not None:
+                encoded_value.update(marker)
+            else:
+                encoded_value.append(marker)
 
-    def encode_element(self, collection, item):
-        if isinstance(item, list):
-            if self.is_self(collection, item):
-                return "[...]"
-
-            self.set_parent(item, collection)
-
-        return self.serialize_inner(item)
-
-    def encode_collection(self, collection):
-        return [
-            self.encode_element(collection, item)
-            for item in collection
-        ]
+        return encoded_value
 
 
 @registry.register_class(dict)
 class DictionarySerializer(AbstractCollectionSerializer):
 
-    def encode_element(self, collection, item):
-        if isinstance(item, dict):
-            if self.is_self(collection, item):
-                return "{...}"
+    def encode_element(self, item, context):
+        if isinstance(item, dict) and context.is_encoding(item):
+            return "{...}"
+
+        return self.serialize_inner(item, context)
 
-            self.set_parent(item, collection)
+    def get_fingerprint(self, value):
+        references = []
+        for key in self.get_elements(value, settings.MAX_COLLECTION_ELEMENTS):
+            references.append(key)
+            references.append(value[key])
 
-        return self.serialize_inner(item)
+        return len(value), references
 
-    def encode_collection(self, dctx):
-        return {
-            self.serialize_inner(key): self.encode_element(dctx, dctx[key])
-            for key in dctx
+    def encode_collection(self, dctx, context):
+        keys = self.get_elements(dctx, context.max_elements)
+        serialize_inner = self.serialize_inner
+        encode_element = self.encode_element
+        encoded_value = {
+            serialize_inner(key, context): encode_element(dctx[key], context)
+            for key in keys
         }
+
+        if keys is not dctx:
+            encoded_value['...'] = context.truncated(dctx, length=len(dctx))
+
+        return encoded_value
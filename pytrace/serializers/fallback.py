@@ -1,4 +1,6 @@
+import inspect
 import types
+import weakref
 
 from pytrace.core.builtins import BuiltinBase
 from pytrace.compat import is_class_instance
@@ -10,33 +12,62 @@ from .builtins import (
 from .base import AbstractSerializer
 
 
+class ExceptionSerializer(AbstractSerializer):
+
+    def encode(self, value, context):
+        return {
+            'type': type(value).__name__,
+            'message': str(value)
+        }
+
+
+class ReprSerializer(AbstractSerializer):
+
+    def encode(self, value, context):
+        return self.encode_repr(value, context)
+
+
 @registry.default
 class FallbackSerializer(AbstractSerializer):
+    """
+    Serializer for types without any registered serializer. Serializer
+    actually encoding values of a type is decided once per type.
+    """
+
+    def __init__(self):
+        self._delegates = weakref.WeakKeyDictionary()
 
     def encode_type(self, type_):
-        if BuiltinBase in type.mro(type_):
+        if issubclass(type_, BuiltinBase):
             type_ = types.BuiltinFunctionType
 
         return super(FallbackSerializer, self).encode_type(type_)
 
-    def encode_exception(self, value):
-        return {
-            'type': type(value).__name__,
-            'message': str(value)
-        }
+    def get_delegate(self, value):
+        value_type = type(value)
+        try:
+            return self._delegates[value_type]
+        except KeyError:
+            pass
 
-    def encode(self, value):
-        mro = type.mro(type(value))
+        mro = inspect.getmro(value_type)
         if BaseException in mro:
-            return self.encode_exception(value)
-
-        if BuiltinBase in mro:
-            return BuiltinFunctionSerializer(parent=self.parent).encode(value)
+            delegate = ExceptionSerializer
+        elif BuiltinBase in mro:
+            delegate = BuiltinFunctionSerializer
+        elif isinstance(value, type):
+            delegate = ClassSerializer
+        elif is_class_instance(value):
+            delegate = InstanceSerializer
+        else:
+            delegate = ReprSerializer
 
-        if isinstance(value, type):
-            return ClassSerializer(parent=self.parent).encode(value)
+        delegate = registry.get_instance(delegate)
+        self._delegates[value_type] = delegate
+        return delegate
 
-        if is_class_instance(value):
-            return InstanceSerializer(parent=self.parent).encode(value)
+    def encode(self, value, context):
+        return self.get_delegate(value).encode(value, context)
 
-        return repr(value)
+    def get_fingerprint(self, value):
+        return self.get_delegate(value).get_fingerprint(value)
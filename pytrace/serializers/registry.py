@@ -1,5 +1,9 @@
 
 
+import inspect
+import weakref
+
+
 class SerializerRegistry(object):
     """
     Holds serializers along with type as key value pair.
@@ -8,10 +12,16 @@ class SerializerRegistry(object):
 
     def __init__(self):
         self._handlers = {}
+        self._exact_types = set()  # Types whose serializer isn't inherited
         self._default = None
+        self._instances = {}
+        self._dispatch = weakref.WeakKeyDictionary()
 
-    def register(self, type_, serializer):
-        """ Register serializer for specific type """
+    def register(self, type_, serializer, subclasses=True):
+        """
+        Register serializer for specific type. Unless `subclasses` is False
+        serializer is also used for subclasses of type.
+        """
         if type_ in self._handlers:
             if serializer == self._handlers[type_]:
                 return
@@ -19,23 +29,30 @@ class SerializerRegistry(object):
             raise ValueError("A hanlder for `%s` already exists" % type_.__name__)
 
         self._handlers[type_] = serializer
+        if not subclasses:
+            self._exact_types.add(type_)
+
+        self._dispatch.clear()
 
-    def register_many(self, types, func):
+    def register_many(self, types, func, subclasses=True):
         """ Register single serializer for multiple types """
         if len(types) == 0:
             raise ValueError("Provide atleat one type handled by serializer")
 
         for type_ in types:
-            self.register(type_, func)
+            self.register(type_, func, subclasses)
 
-    def register_class(self, *types):
+    def register_class(self, *types, **kwargs):
         """
         Decorate to register class as serializer for specified types.
         Class will be lazy initialized and only instance will be for
-        all given types
+        all given types. Pass `subclasses=False` to not use it for
+        subclasses of types.
         """
+        subclasses = kwargs.pop('subclasses', True)
+
         def register_handler(cls):
-            self.register_many(types, cls)
+            self.register_many(types, cls, subclasses)
             return cls
 
         return register_handler
@@ -46,6 +63,7 @@ class SerializerRegistry(object):
         and only instance will be for all given types
         """
         self._default = cls
+        self._dispatch.clear()
         return cls
 
     def get(self, type_, fallback=None):
@@ -58,5 +76,37 @@ class SerializerRegistry(object):
 
         return fallback if fallback is not None else self._default
 
+    def get_instance(self, cls):
+        "Returns the only instance of serializer class `cls`"
+        try:
+            return self._instances[cls]
+        except KeyError:
+            serializer = self._instances[cls] = cls()
+            return serializer
+
+    def resolve(self, type_):
+        """
+        Returns instance of serializer for specified type. Serializer is
+        looked up by walking MRO of type, so subclasses use serializer of
+        their nearest registered base (unless registered for exact type
+        only), and falls back to default. Resolved serializers are cached
+        per type.
+        """
+        try:
+            return self._dispatch[type_]
+        except KeyError:
+            pass
+
+        cls = self._default
+        for base in inspect.getmro(type_):
+            if base in self._handlers and \
+               (base is type_ or base not in self._exact_types):
+                cls = self._handlers[base]
+                break
+
+        serializer = self.get_instance(cls) if cls is not None else None
+        self._dispatch[type_] = serializer
+        return serializer
+
 
 default = SerializerRegistry()
@@ -1,8 +1,6 @@
-
-
 def get_object_name(obj):
     """ Get friendly name of object """
-    if hasattr(obj, '__name__'):
+    try:
         return obj.__name__
-
-    return get_object_name(type(obj))
+    except Exception:  # Not only AttributeError, i.e. lazy modules
+        return get_object_name(type(obj))
@@ -0,0 +1,160 @@
+"""
+Trace sessions materializing heap objects on demand.
+
+A session records a script with `ShallowTraceRecorder`, so steps only hold
+objects bound to variables and truncation markers of objects referenced
+by them. Complete encoding of any object of a step is produced later by
+executing the script again up to that step.
+"""
+
+import gc
+import random
+from collections import deque
+
+import six
+
+from pytrace.serializers import ObjectSerializer
+from pytrace.tracer import ShallowTraceRecorder
+from pytrace.tracer import utils
+
+
+def find_object(roots, heap, heap_id):
+    """
+    Returns object having address `heap_id` within `heap`, searching objects
+    reachable from `roots`. Raises KeyError if there isn't any.
+    """
+    ids = heap._ids
+    seen = set()
+    pending = deque(roots)
+
+    while pending:
+        obj = pending.popleft()
+        if id(obj) in seen:
+            continue
+
+        seen.add(id(obj))
+        if ids.get(id(obj)) == heap_id:
+            return obj
+
+        pending.extend(gc.get_referents(obj))
+
+    raise KeyError(heap_id)
+
+
+class MaterializingMixin(object):
+    """
+    Trace recorder mixin that encodes object having address `heap_id` on
+    step number `step` up to `depth`, and then stops execution
+    """
+
+    def __init__(self, step, heap_id, depth=None, **kwargs):
+        self._target_step = step
+        self._target_id = heap_id
+        self._target_depth = depth
+        self.materialized = None
+        super(MaterializingMixin, self).__init__(**kwargs)
+
+    def _append_trace(self, encoded_frame):
+        super(MaterializingMixin, self)._append_trace(encoded_frame)
+        if self._steps_count > self._target_step:
+            self.materialized = self._materialize()
+            raise SystemExit()
+
+    def _get_roots(self):
+        snapshot = self.snapshot
+        if snapshot is None:
+            return []
+
+        roots = [snapshot.globals]
+        for frame in self.frames:
+            if frame is snapshot.frame:
+                roots.append(snapshot.locals)
+            elif frame in self._frame_ordered_ids:
+                roots.append(utils.get_user_locals(frame))
+
+        return roots
+
+    def _materialize(self):
+        heap = self._serializer.heap
+        try:
+            obj = find_object(self._get_roots(), heap, self._target_id)
+        except KeyError:
+            return None
+
+        serializer = ObjectSerializer(max_depth=self._target_depth)
+        serializer.heap = heap.branch()
+        serializer.reset()
+
+        serializer.encode(obj)
+        encoded = serializer.heap.get_constants()
+        encoded.update(serializer.heap.get_variables())
+        return encoded
+
+
+class TraceSession(object):
+    """
+    Records `script` once with a shallow heap and encodes objects of any
+    recorded step on demand, by executing script again up to that step.
+
+    Module `random` is seeded with `seed` before every execution, so these
+    executions take the same path. Scripts depending on anything else that
+    changes between executions (i.e. time) can't be materialized reliably.
+    """
+
+    def __init__(self, script, input_queue=None,
+                 tracer_class=ShallowTraceRecorder, seed=None, **options):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)
+
+        self.script = script
+        self.input_queue = tuple(input_queue or ())
+        self.tracer_class = tracer_class
+        self.seed = seed
+        self.options = options
+        self._trace = None
+        self._materializing_class = type(
+            'Materializing' + tracer_class.__name__,
+            (MaterializingMixin, tracer_class), {}
+        )
+
+    def _execute(self, tracer):
+        state = random.getstate()
+        random.seed(self.seed)
+        try:
+            return tracer.run(self.script, input_queue=list(self.input_queue))
+        finally:
+            random.setstate(state)
+
+    @property
+    def trace(self):
+        "Recorded trace of script, recorded on first access"
+        if self._trace is None:
+            self._trace = self._execute(self.tracer_class(**self.options))
+
+        return self._trace
+
+    def get_object(self, step, heap_id, depth=None):
+        """
+        Returns heap holding complete encoding of object having address
+        `heap_id` on `step` (index within steps of trace) along with every
+        object it references up to `depth`. If `depth` isn't specified it's
+        bounded by `MAX_ENCODING_DEPTH` only.
+
+        Referenced objects keep addresses they have within trace. Objects
+        which aren't in recorded trace are assigned addresses of their own.
+        Raises KeyError if there isn't any such object on `step`.
+        """
+        if not 0 <= step < len(self.trace['steps']):
+            raise IndexError(step)
+
+        if isinstance(heap_id, six.string_types):
+            heap_id = int(heap_id, 16)
+
+        tracer = self._materializing_class(
+            step=step, heap_id=heap_id, depth=depth, **self.options
+        )
+        self._execute(tracer)
+        if tracer.materialized is None:
+            raise KeyError(heap_id)
+
+        return tracer.materialized
@@ -1,22 +1,81 @@
 from pytrace.conf import settings
+from pytrace.core.records import HeapEntry, StackFrame, Step  # NOQA
 from pytrace.tracer.base import AbstractTraceRecorder
+from pytrace.tracer.delta import DeltaEncodingMixin
+from pytrace.tracer.interning import InterningMixin
+from pytrace.tracer.persistent import PersistentHeapMixin
+from pytrace.tracer.shapes import ShapeEncodingMixin
+from pytrace.serializers import ObjectSerializer
 
 
 class ControlledTraceRecorder(AbstractTraceRecorder):
 
-    def __init__(self, max_steps=None):
+    def __init__(self, max_steps=None, **kwargs):
         if max_steps is None:
             max_steps = settings.MAX_STEPS
 
         self._max_steps = max_steps
-        super(ControlledTraceRecorder, self).__init__()
+        super(ControlledTraceRecorder, self).__init__(**kwargs)
 
     def _encode_frame(self, event, data, top_frame=None):
         super(ControlledTraceRecorder, self). \
              _encode_frame(event, data, top_frame=top_frame)
 
-        if len(self._traces) >= self._max_steps:
-            self._traces.append(dict(
+        if self._steps_count >= self._max_steps:
+            self._append_trace(Step(
                 event='overflow'
             ))
             raise SystemExit()
+
+
+class DeltaTraceRecorder(DeltaEncodingMixin, ControlledTraceRecorder):
+    """
+    Records only changes made on each step along with a full snapshot
+    after every `keyframe_interval` steps. Use
+    `pytrace.tracer.delta.decode_step` to rebuild any step.
+    """
+    pass
+
+
+class PersistentTraceRecorder(PersistentHeapMixin, ControlledTraceRecorder):
+    """
+    Keeps encoded heap across steps, so only changed objects are encoded
+    again and recorded. Steps are delta encoded like `DeltaTraceRecorder`.
+    """
+    pass
+
+
+class InternedTraceRecorder(InterningMixin, ControlledTraceRecorder):
+    """
+    Stores every distinct encoded heap entry once in `values` of the trace
+    and records heap of each step as indices into it. Use
+    `pytrace.tracer.interning.resolve_step` to rebuild heap of a step.
+    """
+    pass
+
+
+class ShapedTraceRecorder(ShapeEncodingMixin, ControlledTraceRecorder):
+    """
+    Stores shape (class and attribute names) of instances once in `shapes`
+    of the trace and records instances within heap of each step as rows of
+    attribute values. Use `pytrace.tracer.shapes.expand_step` to rebuild
+    heap of a step.
+    """
+    pass
+
+
+class ShallowTraceRecorder(ControlledTraceRecorder):
+    """
+    Records objects bound to variables, up to `SHALLOW_ENCODING_DEPTH`, and
+    only name, type and heap id of objects referenced by them. Use
+    `pytrace.session.TraceSession.get_object` to encode any of them later.
+    """
+
+    def __init__(self, serializer=None, **kwargs):
+        if serializer is None:
+            serializer = ObjectSerializer(
+                max_depth=settings.SHALLOW_ENCODING_DEPTH
+            )
+
+        super(ShallowTraceRecorder, self).__init__(serializer=serializer,
+                                                   **kwargs)
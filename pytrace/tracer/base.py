@@ -1,37 +1,66 @@
+import operator
+import weakref
 from collections import OrderedDict
 
+from pytrace import compat
 from pytrace.conf import settings
-from pytrace.core.debugger import ManagedDebugger, DebuggerEvent
+from pytrace.core.codeinfo import get_code_info
+from pytrace.core.debugger import DebuggerEvent, create_debugger
+from pytrace.core.frames import FrameSnapshot
+from pytrace.core.heap import is_constant
+from pytrace.core.records import StackFrame, Step
 from pytrace.serializers import ObjectSerializer
 from pytrace.serializers.utils import get_object_name
 
 from . import utils
 from .signals import SIGNALS
+from .stream import TraceStream
+
+
+UNBOUND = object()  # Value of locals which aren't bound yet
 
 
 class AbstractTraceRecorder(object):
 
-    stack = None
-    current_index = 0
+    frames = ()
+    snapshot = None     # `FrameSnapshot` of current event
     current_line_number = 0
+    _stream = None
 
-    def __init__(self, serializer=None):
+    def __init__(self, serializer=None, backend=None):
         if serializer is None:
             serializer = ObjectSerializer()
 
-        self._debugger = ManagedDebugger(self._debugger_trigger)
+        self._debugger = create_debugger(self._debugger_trigger, backend)
         self._serializer = serializer
         self._initialize()
 
     def _initialize(self):
         self._traces = []
-        self._global_funcs = set()
-        self._frame_ordered_ids = {}
-        self._closer_parents = {}
+        self._steps_count = 0
+        self._streamed_refs = 0
+        self._streamed_output = 0
+        self._frame_ordered_ids = {}    # frame -> uid, until frame exits
+
+        # Code of closures -> uid of frame which last defined them
+        self._closure_owners = weakref.WeakKeyDictionary()
+        # Closure -> uid of frame which created it
+        self._func_owners = weakref.WeakKeyDictionary()
+        self._indexed_objects = 0   # Heap objects checked for closures
         self._current_frame_id = 1
+        # frame -> (values, objects, encoded, read while suspended)
+        self._encoded_frames = {}
+        self._local_names = {}  # code -> names of recorded locals, cells
+
+        # Values of these types are stored in heap once and don't reference
+        # anything, so they aren't encoded again on later steps
+        self._immutable_types = frozenset(
+            t for t in settings.PRIMITIVE_TYPES if is_constant(t)
+        )
 
     def _debugger_trigger(self, event, **kwargs):
         self._serializer.reset()
+        self.snapshot = self._serializer.snapshot = kwargs.get('snapshot')
         frame = kwargs.get('frame', None)
         if frame:
             traceback = kwargs.get('traceback', None)
@@ -39,8 +68,24 @@ class AbstractTraceRecorder(object):
 
         event_data = self._trigger_signal(event, **kwargs)
         self._encode_frame(event, event_data, kwargs.get('top_frame', None))
+        if event == DebuggerEvent.ExitBlock:
+            self._release_frame(frame)
+
         return event_data
 
+    def _release_frame(self, frame):
+        """
+        Drops everything kept about `frame`, once it has exited. Its caller
+        resumes, so locals of caller have to be read again.
+        """
+        self._frame_ordered_ids.pop(frame, None)
+        self._encoded_frames.pop(frame, None)
+
+        caller = frame.f_back
+        cached = self._encoded_frames.get(caller)
+        if cached is not None and cached[3]:
+            self._encoded_frames[caller] = cached[:3] + (False,)
+
     @staticmethod
     def _trigger_signal(event, **kwargs):
         signal = SIGNALS.get(event)
@@ -59,129 +104,241 @@ class AbstractTraceRecorder(object):
         return data
 
     def _walk_frame(self, event, frame, tb):
-        self.stack, self.current_index = self._debugger.get_stack(frame, tb)
-        top_frame, self.current_line_number = self.stack[self.current_index]
+        # Shadow stack of debugger, which has `frame` on top
+        self.frames = self._debugger.frames
+        self.current_line_number = frame.f_lineno
 
         if event == DebuggerEvent.EnterBlock:
-            self._frame_ordered_ids[top_frame] = self._current_frame_id
+            self._frame_ordered_ids[frame] = self._current_frame_id
             self._current_frame_id += 1
 
-        if self.current_index > 1:
-            self._extract_closure_parents(top_frame)
-        else:
-            self._extract_global_funcs(top_frame)
-
-        return top_frame
+        self._index_closures(self.snapshot)
+        return frame
 
     def _encode_frame(self, event, data, top_frame=None):
 
         if top_frame is None:
-            encoded_frame = {}
+            encoded_frame = Step()
         else:
             encoded_frame = self._encode_top_frame(top_frame)
+            self._index_new_closures()
             if encoded_frame is None:
                 return
 
-        encoded_frame['output'] = self._debugger.stdout
-        encoded_frame['event'] = event
-        encoded_frame['eventData'] = data
-        encoded_frame['lineNumber'] = self.current_line_number
-        self._traces.append(encoded_frame)
+        encoded_frame.output_offset = self._debugger.stdout_offset
+        encoded_frame.event = event
+        encoded_frame.event_data = data
+        encoded_frame.line_number = self.current_line_number
+        self._append_trace(encoded_frame)
 
-    def _encode_top_frame(self, top_frame):
-        encoded_stack = []
+    def _append_trace(self, encoded_frame):
+        self._steps_count += 1
+        if self._stream is None:
+            self._traces.append(encoded_frame)
+            return
+
+        step = self._encode_stream_step(encoded_frame)
+        with self._debugger.suspended():
+            self._stream.put(step)
 
-        i = self.current_index
-        current_frame = self.stack[i][0]
+    def _encode_stream_step(self, encoded_frame):
+        """
+        Attaches constants and output produced since the previously streamed
+        step, so steps can be consumed without waiting for the complete trace
+        """
+        step = encoded_frame.copy()
+        heap = self._serializer.heap
 
-        while current_frame and current_frame.f_code.co_name != '<module>':
-            if current_frame in self._frame_ordered_ids:
-                encoded_stack.append(self._encode_stack_frame(current_frame))
+        refs = heap.get_constants(start=self._streamed_refs)
+        if refs:
+            step.refs = refs
+            self._streamed_refs = heap.constants_count
 
-            i -= 1
-            current_frame = self.stack[i][0]
+        output_offset = self._debugger.stdout_offset
+        if output_offset and output_offset > self._streamed_output:
+            step.output = self._debugger.stdout_since(self._streamed_output)
+            self._streamed_output = output_offset
 
-        frame_globals = utils.get_user_globals(top_frame)
+        return step
+
+    def _encode_top_frame(self, top_frame):
+        visited = set()  # Ids of objects of reused frames encoded in step
+        encoded_stack = [
+            self._encode_stack_frame(frame, frame is not top_frame, visited)
+            for frame in reversed(self.frames)
+            if frame in self._frame_ordered_ids
+        ]
+
+        snapshot = self.snapshot
+        if snapshot is None or snapshot.frame is not top_frame:
+            snapshot = FrameSnapshot(top_frame)
+
+        frame_globals = snapshot.globals
         encoded_gloabls = OrderedDict()
 
         for k in frame_globals:
             encoded_gloabls[k] = self._serializer.encode(frame_globals[k])
 
-        return {
-            'name': top_frame.f_code.co_name,
-            'stack': encoded_stack,
-            'heap': self._serializer.heap.get_variables(),
-            'globals': encoded_gloabls
-        }
-
-    def _encode_stack_frame(self, frame):
-        frame_name = frame.f_code.co_name
-        if not frame_name:
-            frame_name = settings.UNKNOWN_FUNCTION
+        return Step(
+            name=top_frame.f_code.co_name,
+            stack=encoded_stack,
+            heap=self._serializer.heap.get_variables(),
+            globals=encoded_gloabls
+        )
+
+    def _encode_stack_frame(self, frame, suspended, visited):
+        """
+        Encodes locals of frame in order of `CodeInfo.local_names`. Encoded
+        frame is reused as long as its locals are bound to same objects,
+        in which case only objects which may have changed are encoded again,
+        unless another reused frame of the step already did so.
+
+        Locals of a `suspended` frame, which isn't on top of stack, can
+        only be rebound through its cell and free variables, so once read
+        only these are read again.
+        """
+        code = frame.f_code
+        layout = self._local_names.get(code)
+        if layout is None:
+            layout = self._local_names[code] = self._get_locals_layout(code)
+
+        names, cells = layout
+        cached = self._encoded_frames.get(frame)
+        if suspended and cached is not None and cached[3]:
+            values = cached[0]
+            if cells:
+                frame_locals = frame.f_locals
+                values = list(values)
+                for i, k in cells:
+                    values[i] = frame_locals.get(k, UNBOUND)
+        else:
+            snapshot = self.snapshot
+            if snapshot is not None and snapshot.frame is frame:
+                frame_locals = snapshot.frame_locals
+            else:
+                frame_locals = frame.f_locals
 
-        frame_locals = utils.get_user_locals(frame)
-        encoded_locals = {}
+            values = [frame_locals.get(k, UNBOUND) for k in names]
 
-        for k in frame_locals:
-            encoded_locals[k] = self._serializer.encode(frame_locals[k])
+        encode = self._serializer.encode
+        if cached is not None and (values is cached[0] or
+                                   all(map(operator.is_, cached[0], values))):
+            for value in cached[1]:
+                if id(value) not in visited:
+                    visited.add(id(value))
+                    encode(value)
 
-        ordered_locals = OrderedDict()
-        for e in frame.f_code.co_varnames:
-            if e in encoded_locals:
-                ordered_locals[e] = encoded_locals[e]
+            if suspended and not cached[3]:
+                self._encoded_frames[frame] = cached[:3] + (True,)
 
-        for e in sorted(encoded_locals.keys()):
-            for k in ordered_locals:
-                if k == e:
-                    continue
+            return cached[2]
 
-                ordered_locals[e] = encoded_locals[e]
+        frame_name = code.co_name
+        if not frame_name:
+            frame_name = settings.UNKNOWN_FUNCTION
 
-        return {
-            'name': frame_name,
-            'locals': ordered_locals,
-            'uid': self.get_frame_id(frame)
-        }
+        encoded_locals = OrderedDict()
+        for k, value in zip(names, values):
+            if value is not UNBOUND:
+                encoded_locals[k] = encode(value)
+
+        immutable_types = self._immutable_types
+        objects = [
+            v for v in values
+            if v is not UNBOUND and type(v) not in immutable_types
+        ]
+
+        encoded = StackFrame(
+            name=frame_name,
+            locals=encoded_locals,
+            uid=self.get_frame_id(frame)
+        )
+        self._encoded_frames[frame] = (values, objects, encoded, suspended)
+        return encoded
 
-    def _extract_closure_parents(self, frame):
-        for closure in utils.extract_frame_closures(frame):
-            if (closure in self._closer_parents or
-               closure in self._global_funcs):
+    @staticmethod
+    def _get_locals_layout(code):
+        "Returns names of recorded locals of `code`, and indices of cells"
+        names = tuple(
+            k for k in get_code_info(code).local_names
+            if k not in settings.IGNORE_VARS
+        )
+        cell_names = set(code.co_cellvars + code.co_freevars)
+        cells = tuple((i, k) for i, k in enumerate(names) if k in cell_names)
+        return names, cells
+
+    def _index_closures(self, snapshot):
+        """
+        Records frame of `snapshot` as owner of code of closures defined by
+        code of that frame. Closures are only created by the executing
+        frame, which stays the last owner of their code until they are
+        encoded, so `_index_new_closures` attributes them to it.
+        """
+        frame = snapshot.frame
+        nested_codes = snapshot.info.nested_codes
+        uid = self._frame_ordered_ids.get(frame)
+        if not nested_codes or uid is None:
+            return  # Neither defines closures nor is a function frame
+
+        owners = self._closure_owners
+        for code in nested_codes:
+            if owners.get(code) == uid:
                 continue
 
-            parent_frame = utils.find_closure_owner_frame(self.stack, closure)
-            if parent_frame in self._frame_ordered_ids:
-                self._closer_parents[closure] = parent_frame
-                frame_name = parent_frame.f_code.co_name
-                closure.__parent__ = closure.func_globals.get(frame_name, None)
+            owners[code] = uid
+            parent = frame.f_globals.get(frame.f_code.co_name)
+            if type(parent) in utils.FUNCTION_TYPES:
+                get_code_info(code).parent = parent
+
+    def _index_new_closures(self):
+        """
+        Records owner of closures given a heap address since last step,
+        wherever they are stored i.e. in containers or attributes.
+        """
+        heap = self._serializer.heap
+        start, self._indexed_objects = \
+            self._indexed_objects, heap.objects_count
+        owners = self._closure_owners
+        if not owners:
+            return
 
-    def _extract_global_funcs(self, frame):
-        user_globals = utils.get_user_globals(frame)
-        for k in user_globals:
-            var = user_globals[k]
-            if type(var) in utils.FUNCTION_TYPES and \
-               var not in self._closer_parents:
-                self._global_funcs.add(var)
+        for value in heap.get_objects(start):
+            if type(value) in utils.FUNCTION_TYPES:
+                func = getattr(value, '__func__', value)
+                uid = owners.get(compat.get_func_code(func))
+                if uid is not None:
+                    self._func_owners[func] = uid
 
     def get_frame_id(self, frame):
         return self._frame_ordered_ids[frame]
 
     def get_func_parent_frame_id(self, func):
-        if func not in self._global_funcs:
-            return None
-
-        return self.get_frame_id(self._closer_parents[func])
+        "Returns uid of frame which created closure `func`, if it's known"
+        return self._func_owners.get(getattr(func, '__func__', func))
 
     def run(self, script, input_queue=None):
         self._initialize()
         self._serializer.heap.clear()
         self._debugger.run(script, input_queue)
+
+        # Frames which didn't exit i.e. when execution was stopped
+        self._frame_ordered_ids.clear()
+        self._encoded_frames.clear()
+        self.snapshot = self._serializer.snapshot = None
         return {
-            'scriptLines': self._debugger.script_lines,
+            'scriptLines': list(self._debugger.script_lines),
             'refs': self._serializer.heap.get_constants(),
+            'output': self._debugger.stdout,
             'steps': self._traces
         }
 
+    def iter_run(self, script, input_queue=None):
+        """
+        Returns an iterable `TraceStream` that yields each step as soon
+        as it is recorded
+        """
+        return TraceStream(self, script, input_queue)
+
     def normalize_return_after_exception(self):
         if self._traces[-2]['event'] != DebuggerEvent.Exception:
             return
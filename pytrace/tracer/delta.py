@@ -0,0 +1,270 @@
+"""
+Delta encoding of recorded steps.
+
+A delta encoded trace stores a full snapshot (keyframe) of heap, globals and
+stack every `KEYFRAME_INTERVAL` steps. All the steps in between only store
+what changed since the previous step under the `delta` key. Steps without
+any frame information (i.e. syntax errors or overflow) are stored as is.
+"""
+
+from collections import OrderedDict
+
+from pytrace.conf import settings
+
+
+FRAME_KEYS = ('heap', 'globals', 'stack')
+
+
+def is_keyframe(step):
+    "Returns True if step holds a full snapshot of heap, globals and stack"
+    return 'heap' in step
+
+
+def is_delta(step):
+    "Returns True if step only holds changes since previous step"
+    return 'delta' in step
+
+
+def diff_bindings(old, new):
+    """
+    Returns changes required to turn `old` ordered bindings into `new` one.
+    Falls back to complete replacement when applying the changes won't
+    preserve the order of `new` bindings.
+    """
+    changes = {}
+    updated = OrderedDict(
+        (k, v) for k, v in old.items() if k in new
+    )
+
+    removed = [k for k in old if k not in new]
+    if removed:
+        changes['del'] = removed
+
+    modified = OrderedDict()
+    for k in new:
+        if k not in old or old[k] != new[k]:
+            modified[k] = new[k]
+            updated[k] = new[k]
+
+    if modified:
+        changes['set'] = modified
+
+    if list(updated) != list(new):
+        return {'replace': new}
+
+    return changes
+
+
+def apply_bindings(old, changes):
+    "Applies changes returned by `diff_bindings` and returns new bindings"
+    if 'replace' in changes:
+        return OrderedDict(changes['replace'])
+
+    bindings = OrderedDict(old)
+    for k in changes.get('del', ()):
+        del bindings[k]
+
+    for k, v in changes.get('set', {}).items():
+        bindings[k] = v
+
+    return bindings
+
+
+def diff_heap(old, new):
+    changes = {}
+
+    removed = [k for k in old if k not in new]
+    if removed:
+        changes['del'] = removed
+
+    modified = {
+        k: v for k, v in new.items()
+        if k not in old or old[k] != v
+    }
+    if modified:
+        changes['set'] = modified
+
+    return changes
+
+
+def apply_heap(old, changes):
+    heap = dict(old)
+    for k in changes.get('del', ()):
+        del heap[k]
+
+    heap.update(changes.get('set', {}))
+    return heap
+
+
+def diff_stack(old, new):
+    """
+    Returns changes required to turn `old` stack into `new` one. Both stacks
+    are expected to have top most frame first. Frames are matched from
+    bottom using their `uid`. Frames reused as they are, i.e. of suspended
+    calls, are skipped without being compared.
+    """
+    common = 0
+    for old_frame, new_frame in zip(reversed(old), reversed(new)):
+        if old_frame is not new_frame and old_frame['uid'] != new_frame['uid']:
+            break
+
+        common += 1
+
+    changes = {}
+    if len(old) > common:
+        changes['pop'] = len(old) - common
+
+    if len(new) > common:
+        changes['push'] = new[:len(new) - common]
+
+    frames = []
+    for i in range(1, common + 1):
+        if old[-i] is new[-i]:
+            continue
+
+        old_locals, new_locals = old[-i]['locals'], new[-i]['locals']
+        if old_locals != new_locals:
+            bindings = diff_bindings(old_locals, new_locals)
+            frames.append([new[-i]['uid'], bindings])
+
+    if frames:
+        changes['frames'] = frames
+
+    return changes
+
+
+def apply_stack(old, changes):
+    stack = list(old[changes.get('pop', 0):])
+    frame_changes = dict(
+        (uid, bindings) for uid, bindings in changes.get('frames', ())
+    )
+
+    for i, frame in enumerate(stack):
+        if frame['uid'] in frame_changes:
+            frame = frame.copy()
+            frame['locals'] = apply_bindings(
+                frame['locals'], frame_changes[frame['uid']]
+            )
+            stack[i] = frame
+
+    return list(changes.get('push', ())) + stack
+
+
+def encode_delta(previous, current, heap_changes=None):
+    """
+    Returns a step holding only the changes made to heap, globals and
+    stack of `previous` step to reach `current` one. Rest of the
+    `current` step is kept as is.
+
+    Heap isn't compared if already known `heap_changes` are passed.
+    """
+    delta = {}
+
+    heap = heap_changes
+    if heap is None:
+        heap = diff_heap(previous['heap'], current['heap'])
+
+    if heap:
+        delta['heap'] = heap
+
+    frame_globals = diff_bindings(previous['globals'], current['globals'])
+    if frame_globals:
+        delta['globals'] = frame_globals
+
+    stack = diff_stack(previous['stack'], current['stack'])
+    if stack:
+        delta['stack'] = stack
+
+    step = current.copy()
+    for key in FRAME_KEYS:
+        step.pop(key, None)
+
+    step['delta'] = delta
+    return step
+
+
+def apply_delta(previous, step):
+    "Rebuilds the complete step from delta `step` and its `previous` step"
+    delta = step['delta']
+
+    decoded_step = step.copy()
+    del decoded_step['delta']
+    decoded_step['heap'] = apply_heap(previous['heap'], delta.get('heap', {}))
+    decoded_step['globals'] = apply_bindings(
+        previous['globals'], delta.get('globals', {})
+    )
+    decoded_step['stack'] = apply_stack(
+        previous['stack'], delta.get('stack', {})
+    )
+    return decoded_step
+
+
+def iter_decoded_steps(steps):
+    """
+    Iterates over delta encoded `steps` and yields complete steps.
+    """
+    previous = None
+    for step in steps:
+        if is_delta(step):
+            step = apply_delta(previous, step)
+
+        if is_keyframe(step):
+            previous = step
+
+        yield step
+
+
+def decode_step(steps, index):
+    """
+    Rebuilds complete step at `index` starting from nearest keyframe
+    before it.
+    """
+    step = steps[index]
+    if not is_delta(step):
+        return step
+
+    start = index - 1
+    while not is_keyframe(steps[start]):
+        start -= 1
+
+    decoded_step = None
+    for decoded_step in iter_decoded_steps(steps[start:index + 1]):
+        pass
+
+    return decoded_step
+
+
+class DeltaEncodingMixin(object):
+    """
+    Trace recorder mixin that delta encodes recorded steps. A full snapshot
+    is recorded on every `keyframe_interval` steps.
+    """
+
+    def __init__(self, keyframe_interval=None, **kwargs):
+        if keyframe_interval is None:
+            keyframe_interval = settings.KEYFRAME_INTERVAL
+
+        assert keyframe_interval > 0, "keyframe_interval must be positive"
+        self._keyframe_interval = keyframe_interval
+        super(DeltaEncodingMixin, self).__init__(**kwargs)
+
+    def _initialize(self):
+        super(DeltaEncodingMixin, self)._initialize()
+        self._previous_frame = None
+        self._recorded_frames = 0
+
+    def _append_trace(self, encoded_frame):
+        if is_keyframe(encoded_frame):
+            previous = self._previous_frame
+            self._previous_frame = encoded_frame
+
+            if (previous is not None and
+               self._recorded_frames % self._keyframe_interval):
+                encoded_frame = self._encode_delta(previous, encoded_frame)
+
+            self._recorded_frames += 1
+
+        super(DeltaEncodingMixin, self)._append_trace(encoded_frame)
+
+    def _encode_delta(self, previous, encoded_frame):
+        return encode_delta(previous, encoded_frame)
@@ -0,0 +1,79 @@
+"""
+Interned heap recording.
+
+Encoded heap entries are hash consed into a `values` table of the trace
+and steps reference them by their index, so an object which doesn't change
+is stored once no matter how many steps it appears in.
+"""
+
+from pytrace.core.interning import InternTable
+from pytrace.serializers import ObjectSerializer
+
+
+def resolve_heap(heap, values):
+    "Returns heap with indices replaced by values they refer"
+    return {k: values[i] for k, i in heap.items()}
+
+
+def resolve_step(step, values):
+    """
+    Returns complete step with heap entries looked up from `values` table.
+    Delta encoded steps must be decoded before being resolved.
+    """
+    if 'heap' not in step:
+        return step
+
+    step = step.copy()
+    step['heap'] = resolve_heap(step['heap'], values)
+    return step
+
+
+def iter_resolved_steps(trace):
+    values = trace['values']
+    for step in trace['steps']:
+        yield resolve_step(step, values)
+
+
+class InterningMixin(object):
+    """
+    Trace recorder mixin that records heap entries as index of their
+    interned value in the `values` table of the trace
+    """
+
+    def __init__(self, serializer=None, **kwargs):
+        if serializer is None:
+            serializer = ObjectSerializer()
+
+        self._values = serializer.values = InternTable()
+        super(InterningMixin, self).__init__(serializer=serializer, **kwargs)
+
+    def _initialize(self):
+        super(InterningMixin, self)._initialize()
+        self._values.clear()
+        self._streamed_values = 0
+
+    def _encode_top_frame(self, top_frame):
+        encoded_frame = super(InterningMixin, self)._encode_top_frame(
+            top_frame)
+        if encoded_frame is not None:
+            index = self._values.index
+            encoded_frame.heap = {
+                k: index(v) for k, v in encoded_frame.heap.items()
+            }
+
+        return encoded_frame
+
+    def _encode_stream_step(self, encoded_frame):
+        step = super(InterningMixin, self)._encode_stream_step(encoded_frame)
+
+        values = self._values.values
+        if len(values) > self._streamed_values:
+            step['values'] = values[self._streamed_values:]
+            self._streamed_values = len(values)
+
+        return step
+
+    def run(self, script, input_queue=None):
+        trace = super(InterningMixin, self).run(script, input_queue)
+        trace['values'] = self._values.values
+        return trace
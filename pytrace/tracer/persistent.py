@@ -0,0 +1,40 @@
+"""
+Persistent heap recording.
+
+Encoded objects are kept in heap across steps and only objects whose
+fingerprint changed are encoded again. Steps are delta encoded using the
+changes tracked by heap, so recorded size of a step follows what changed
+rather than size of the whole heap.
+"""
+
+from pytrace.serializers.base import PersistentObjectSerializer
+
+from .delta import DeltaEncodingMixin, encode_delta, is_keyframe
+
+
+class PersistentHeapMixin(DeltaEncodingMixin):
+    """
+    Trace recorder mixin that keeps heap across steps and records only
+    changed heap entries on steps between keyframes
+    """
+
+    def __init__(self, serializer=None, **kwargs):
+        if serializer is None:
+            serializer = PersistentObjectSerializer()
+
+        super(PersistentHeapMixin, self).__init__(serializer=serializer,
+                                                  **kwargs)
+
+    def _initialize(self):
+        super(PersistentHeapMixin, self)._initialize()
+        self._heap_changes = None
+
+    def _append_trace(self, encoded_frame):
+        if is_keyframe(encoded_frame):
+            self._heap_changes = self._serializer.heap.commit()
+
+        super(PersistentHeapMixin, self)._append_trace(encoded_frame)
+
+    def _encode_delta(self, previous, encoded_frame):
+        return encode_delta(previous, encoded_frame,
+                            heap_changes=self._heap_changes)
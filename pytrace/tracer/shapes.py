@@ -0,0 +1,67 @@
+"""
+Shape encoded heap recording.
+
+Instances within heap of each step are grouped by their shape i.e. class and
+names of attributes. Every shape is stored once in `shapes` of the trace and
+steps hold instances as rows of attribute values under `instances`.
+"""
+
+from pytrace.core.shapes import ShapeTable, decode_heap, encode_heap
+
+
+def expand_step(step, shapes):
+    """
+    Returns complete step with shape encoded instances moved back into its
+    heap. Delta encoded steps must be decoded before being expanded.
+    """
+    if 'instances' not in step:
+        return step
+
+    step = step.copy()
+    step['heap'] = decode_heap(step['heap'], step.pop('instances'), shapes)
+    return step
+
+
+def iter_expanded_steps(trace):
+    shapes = trace['shapes']
+    for step in trace['steps']:
+        yield expand_step(step, shapes)
+
+
+class ShapeEncodingMixin(object):
+    """
+    Trace recorder mixin that records instances within heap as rows of
+    their shape stored in the `shapes` table of the trace
+    """
+
+    def _initialize(self):
+        super(ShapeEncodingMixin, self)._initialize()
+        self._shapes = ShapeTable()
+        self._streamed_shapes = 0
+
+    def _encode_top_frame(self, top_frame):
+        encoded_frame = super(ShapeEncodingMixin, self)._encode_top_frame(
+            top_frame)
+        if encoded_frame is not None:
+            encoded_frame.heap, instances = encode_heap(encoded_frame.heap,
+                                                        self._shapes)
+            if instances:
+                encoded_frame.instances = instances
+
+        return encoded_frame
+
+    def _encode_stream_step(self, encoded_frame):
+        step = super(ShapeEncodingMixin, self)._encode_stream_step(
+            encoded_frame)
+
+        shapes = self._shapes.shapes
+        if len(shapes) > self._streamed_shapes:
+            step.shapes = shapes[self._streamed_shapes:]
+            self._streamed_shapes = len(shapes)
+
+        return step
+
+    def run(self, script, input_queue=None):
+        trace = super(ShapeEncodingMixin, self).run(script, input_queue)
+        trace['shapes'] = self._shapes.shapes
+        return trace
@@ -0,0 +1,107 @@
+"""
+Streaming of recorded steps while script is still being executed.
+"""
+
+import sys
+import threading
+
+import six
+
+
+class TraceStream(object):
+    """
+    Iterable over steps of a script traced by `recorder`.
+
+    Script is executed in a background thread which pauses right after
+    recording each step until the consumer asks for the next one. So only
+    a single step is held in memory at any time. Constants and output
+    produced since the previous step are attached to each step under
+    `refs` and `output` keys and are also accumulated within `refs` and
+    `output` attributes of the stream.
+
+    As `pytrace.core.sandbox.Sandbox` replaces global standard streams and
+    input queue, only a single script can be traced at a time.
+    """
+
+    def __init__(self, recorder, script, input_queue=None):
+        self.script_lines = script.splitlines()
+        self.refs = {}
+        self._output = []
+
+        self._recorder = recorder
+        self._script = script
+        self._input_queue = input_queue
+
+        self._pending = None
+        self._finished = False
+        self._closed = False
+        self._started = False
+        self._exc_info = None
+
+        self._step_ready = threading.Semaphore(0)
+        self._resume = threading.Semaphore(0)
+
+    @property
+    def output(self):
+        "Output written to standard output streams so far"
+        if len(self._output) > 1:
+            self._output = [''.join(self._output)]
+
+        return self._output[0] if self._output else ''
+
+    def put(self, step):
+        """
+        Called from tracing thread to hand over recorded step. Blocks
+        until consumer requests the next step.
+        """
+        if self._closed:
+            raise SystemExit()
+
+        self._pending = step
+        self._step_ready.release()
+        self._resume.acquire()
+
+        if self._closed:
+            raise SystemExit()
+
+    def _run(self):
+        self._recorder._stream = self
+        try:
+            self._recorder.run(self._script, input_queue=self._input_queue)
+        except BaseException:
+            self._exc_info = sys.exc_info()
+        finally:
+            self._recorder._stream = None
+            self._finished = True
+            self._step_ready.release()
+
+    def __iter__(self):
+        assert not self._started, "TraceStream can only be iterated once"
+        self._started = True
+
+        thread = threading.Thread(target=self._run)
+        thread.daemon = True
+        thread.start()
+
+        try:
+            while True:
+                self._step_ready.acquire()
+                if self._finished:
+                    break
+
+                step, self._pending = self._pending, None
+                self.refs.update(step.get('refs', {}))
+                if 'output' in step:
+                    self._output.append(step['output'])
+
+                yield step
+                self._resume.release()
+        finally:
+            if not self._finished:
+                self._closed = True
+                self._resume.release()
+
+            thread.join()
+
+        if self._exc_info is not None:
+            six.reraise(*self._exc_info)
@@ -0,0 +1,45 @@
+import unittest2
+
+import pytrace
+
+
+SCRIPTS = [
+    "x = input()\nprint (x * %d)" % i
+    for i in range(6)
+]
+INPUTS = [['abc'] for _ in SCRIPTS]
+
+
+class TraceManyTests(unittest2.TestCase):
+
+    def test_ordered(self):
+        traces = list(pytrace.trace_many(SCRIPTS, INPUTS, processes=2,
+                                         max_jobs_per_worker=2))
+        self.assertEqual(len(traces), len(SCRIPTS))
+        for i, trace in enumerate(traces):
+            self.assertEqual(trace['output'], 'abc' * i + '\n')
+            self.assertEqual(trace, pytrace.trace(SCRIPTS[i], INPUTS[i]))
+
+    def test_unordered(self):
+        results = list(pytrace.trace_many(SCRIPTS, INPUTS, processes=2,
+                                          ordered=False))
+        self.assertEqual(sorted(i for i, _ in results),
+                         list(range(len(SCRIPTS))))
+        for i, trace in results:
+            self.assertEqual(trace['output'], 'abc' * i + '\n')
+
+    def test_options(self):
+        traces = list(pytrace.trace_many(SCRIPTS[:2], processes=1,
+                                         max_steps=1))
+        for trace in traces:
+            self.assertEqual(trace['steps'][-1]['event'], 'overflow')
+
+    def test_chunks(self):
+        traces = list(pytrace.trace_many(SCRIPTS, INPUTS, processes=2,
+                                         max_jobs_per_worker=1, chunksize=3))
+        for i, trace in enumerate(traces):
+            self.assertEqual(trace['output'], 'abc' * i + '\n')
+
+    def test_inputs_mismatch(self):
+        with self.assertRaises(ValueError):
+            pytrace.trace_many(SCRIPTS, INPUTS[:-1])
@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import unittest2
+
+import pytrace
+from pytrace.conf import settings
+from pytrace.cache import TraceCache, make_key
+from pytrace.core.debugger import is_monitoring_available
+from pytrace.tracer import ControlledTraceRecorder
+
+
+class CountingTraceRecorder(ControlledTraceRecorder):
+
+    runs = 0
+
+    def run(self, *args, **kwargs):
+        CountingTraceRecorder.runs += 1
+        return super(CountingTraceRecorder, self).run(*args, **kwargs)
+
+
+class TraceCacheTests(unittest2.TestCase):
+
+    def setUp(self):
+        CountingTraceRecorder.runs = 0
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def trace(self, cache, script, input_queue=None, **options):
+        return pytrace.trace(script, input_queue, cache=cache,
+                             tracer_class=CountingTraceRecorder, **options)
+
+    def test_hit(self):
+        cache = TraceCache()
+        trace1 = self.trace(cache, "x = 1")
+        trace2 = self.trace(cache, "x = 1")
+        self.assertEqual(trace1, trace2)
+        self.assertIsNot(trace1, trace2)
+        self.assertEqual(CountingTraceRecorder.runs, 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_key(self):
+        recorder = ControlledTraceRecorder
+        key = make_key("x = 1", None, recorder, {})
+        self.assertNotEqual(key, make_key("x = 2", None, recorder, {}))
+        self.assertNotEqual(key, make_key("x = 1", [1], recorder, {}))
+        self.assertNotEqual(key, make_key("x = 1", None,
+                                          CountingTraceRecorder, {}))
+        self.assertNotEqual(key, make_key("x = 1", None, recorder,
+                                          {'max_steps': 1}))
+
+        old_max_steps = settings.MAX_STEPS
+        settings.MAX_STEPS = old_max_steps + 1
+        try:
+            self.assertNotEqual(key, make_key("x = 1", None,
+                                              ControlledTraceRecorder, {}))
+        finally:
+            settings.MAX_STEPS = old_max_steps
+
+    def test_settings_miss(self):
+        cache = TraceCache()
+        self.trace(cache, "x = 1")
+
+        old_value = settings.OPAQUE_FUNCTIONS
+        settings.OPAQUE_FUNCTIONS = ('f',)
+        try:
+            self.trace(cache, "x = 1")
+        finally:
+            settings.OPAQUE_FUNCTIONS = old_value
+
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_backend_key(self):
+        backend = 'monitoring' if is_monitoring_available() else 'bdb'
+        old_backend = settings.DEBUGGER_BACKEND
+        settings.DEBUGGER_BACKEND = 'auto'
+        try:
+            key = make_key("x = 1", None, ControlledTraceRecorder, {})
+        finally:
+            settings.DEBUGGER_BACKEND = old_backend
+
+        # Same debugger is used to record the trace
+        self.assertEqual(key, make_key("x = 1", None, ControlledTraceRecorder,
+                                       {'backend': backend}))
+        if backend != 'bdb':
+            self.assertNotEqual(key, make_key("x = 1", None,
+                                              ControlledTraceRecorder,
+                                              {'backend': 'bdb'}))
+
+    def test_lru_eviction(self):
+        cache = TraceCache(max_entries=2)
+        for script in ("x = 1", "x = 2", "x = 1", "x = 3", "x = 1", "x = 2"):
+            self.trace(cache, script)
+
+        self.assertEqual(CountingTraceRecorder.runs, 4)
+        self.assertEqual(cache.evictions, 2)
+        self.assertEqual(len(cache), 2)
+
+    def test_disk_store(self):
+        self.trace(TraceCache(directory=self.directory), "x = 1")
+        cache = TraceCache(directory=self.directory)
+        self.trace(cache, "x = 1")
+        self.assertEqual(CountingTraceRecorder.runs, 1)
+        self.assertEqual(cache.disk_hits, 1)
+
+    def test_disk_eviction(self):
+        cache = TraceCache(max_entries=0, directory=self.directory)
+        self.trace(cache, "x = 1")
+        size = sum(
+            os.path.getsize(os.path.join(self.directory, e))
+            for e in os.listdir(self.directory)
+        )
+
+        cache.max_disk_size = size
+        self.trace(cache, "x = 2")
+        self.assertEqual(cache.disk_evictions, 1)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+    def test_disk_eviction_order(self):
+        self.trace(TraceCache(directory=self.directory), "x = 1")
+        size = os.path.getsize(os.path.join(self.directory,
+                                            os.listdir(self.directory)[0]))
+
+        cache = TraceCache(max_entries=0, directory=self.directory,
+                           max_disk_size=2 * size)
+        self.trace(cache, "x = 2")
+        self.trace(cache, "x = 1")  # Read from disk, so used after `x = 2`
+        self.trace(cache, "x = 3")
+        self.assertEqual(cache.disk_evictions, 1)
+
+        self.trace(cache, "x = 1")
+        self.trace(cache, "x = 2")
+        self.assertEqual(CountingTraceRecorder.runs, 4)
@@ -0,0 +1,85 @@
+import unittest2
+
+import six
+
+from pytrace import compat
+from pytrace.core.codeinfo import get_code_info
+
+
+def function(a, b=1, *args, **kwargs):
+    c = a + b
+    return c
+
+
+class Owner(object):
+
+    def method(self, x):
+        return x
+
+    @classmethod
+    def class_method(cls):
+        pass
+
+
+class Child(Owner):
+    pass
+
+
+class CodeInfoTests(unittest2.TestCase):
+
+    def test_arguments(self):
+        info = get_code_info(compat.get_func_code(function))
+        self.assertEqual(info.args, ('a', 'b'))
+        self.assertEqual(info.varargs, 'args')
+        self.assertEqual(info.keywords, 'kwargs')
+        self.assertEqual(info.arguments, ('a', 'b', 'args', 'kwargs'))
+        self.assertFalse(info.is_lambda)
+
+    def test_local_names(self):
+        def outer(a):
+            b = 1
+            z = y = b + 1
+            return lambda: a + y + z
+
+        info = get_code_info(compat.get_func_code(outer))
+        self.assertEqual(info.local_names[:2], ('a', 'b'))
+        self.assertEqual(sorted(info.local_names), ['a', 'b', 'y', 'z'])
+        self.assertEqual(info.local_names[-2:], ('y', 'z'))
+
+        inner = get_code_info(compat.get_func_code(outer(0)))
+        self.assertEqual(inner.local_names, ('a', 'y', 'z'))
+
+    def test_nested_codes(self):
+        def outer():
+            return lambda: 1
+
+        info = get_code_info(compat.get_func_code(outer))
+        self.assertEqual(info.nested_codes,
+                         {compat.get_func_code(outer())})
+        self.assertEqual(get_code_info(compat.get_func_code(function))
+                         .nested_codes, frozenset())
+
+    def test_lambda(self):
+        func = lambda x: x  # NOQA
+        info = get_code_info(compat.get_func_code(func))
+        self.assertTrue(info.is_lambda)
+        self.assertEqual(info.arguments, ('x', ))
+
+    @unittest2.skipUnless(six.PY3, "Keyword only arguments require Python 3")
+    def test_keyword_only_arguments(self):
+        namespace = {}
+        exec("def func(a, *args, b, **kwargs): pass", namespace)
+        info = get_code_info(namespace['func'].__code__)
+        self.assertEqual(info.args, ('a', ))
+        self.assertEqual(info.kwonlyargs, ('b', ))
+        self.assertEqual(info.arguments, ('a', 'b', 'args', 'kwargs'))
+
+    def test_cached(self):
+        code = compat.get_func_code(function)
+        self.assertIs(get_code_info(code), get_code_info(code))
+
+    def test_owner_class(self):
+        self.assertIs(compat.get_im_class(Owner().method), Owner)
+        self.assertIs(compat.get_im_class(Child().method), Owner)
+        self.assertIs(compat.get_im_class(Child.class_method), Owner)
+        self.assertIsNone(compat.get_im_class(function))
@@ -0,0 +1,56 @@
+import unittest2
+
+from pytrace.core.compiler import compile_script
+
+
+TEST_SCRIPT = """
+class A(object):
+    class B(object):
+        pass
+
+    def method(self):
+        return [e for e in range(3)]
+
+def decorator(cls):
+    return cls
+
+@decorator
+class C(object):
+    f = lambda self: 1
+"""
+
+
+def find_code(code, name):
+    if code.co_name == name:
+        return code
+
+    for const in code.co_consts:
+        if hasattr(const, 'co_name'):
+            found = find_code(const, name)
+            if found is not None:
+                return found
+
+
+class CompileScriptTests(unittest2.TestCase):
+
+    def test_cache(self):
+        self.assertIs(compile_script(TEST_SCRIPT), compile_script(TEST_SCRIPT))
+        self.assertIsNot(compile_script("x = 1"), compile_script("x = 2"))
+
+    def test_syntax_error(self):
+        self.assertRaises(SyntaxError, compile_script, "print 'Hello")
+
+    def test_lines(self):
+        compiled_script = compile_script(TEST_SCRIPT)
+        self.assertEqual(compiled_script.lines,
+                         tuple(TEST_SCRIPT.splitlines()))
+
+    def test_class_bodies(self):
+        compiled_script = compile_script(TEST_SCRIPT)
+        for name in ('A', 'B', 'C'):
+            code = find_code(compiled_script.code, name)
+            self.assertTrue(compiled_script.is_class_body(code))
+
+        for name in ('method', 'decorator', '<lambda>'):
+            code = find_code(compiled_script.code, name)
+            self.assertFalse(compiled_script.is_class_body(code))
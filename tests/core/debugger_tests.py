@@ -1,6 +1,7 @@
 import unittest2
 import inspect
 
+from pytrace.conf import settings
 from pytrace.core.debugger import ManagedDebugger, DebuggerEvent
 
 
@@ -12,6 +13,29 @@ def hello(arg1, arg2, *args, **kwargs):
 hello(1, 2, 3, 4, 5, 6, x=1, y=3)
 """
 
+TEST_NESTED_SCRIPT = """
+def fail():
+    raise ValueError()
+
+def outer():
+    try:
+        fail()
+    except ValueError:
+        pass
+    return 1
+
+outer()
+"""
+
+TEST_OPAQUE_SCRIPT = """
+import random
+def opaque(items):
+    random.shuffle(items)
+    return items
+
+items = opaque(list(range(100)))
+"""
+
 
 class ManagedDebuggerTests(unittest2.TestCase):
 
@@ -98,3 +122,43 @@ class ManagedDebuggerTests(unittest2.TestCase):
         assert isinstance(kwargs['ex_type'], type)
         assert inspect.istraceback(kwargs['traceback'])
         assert inspect.isframe(kwargs['frame'])
+
+    def test_foreign_frames(self):
+        self.debugger_events = []
+        debugger = ManagedDebugger(self._debugger_step)
+        debugger.run("import random\nrandom.shuffle(list(range(100)))")
+        assert [e[0] for e in self.debugger_events] == [
+            DebuggerEvent.StepLine, DebuggerEvent.StepLine,
+            DebuggerEvent.ExitBlock
+        ]
+
+    def test_opaque_functions(self):
+        old_opaque_functions = settings.OPAQUE_FUNCTIONS
+        settings.OPAQUE_FUNCTIONS = ('opaque',)
+        try:
+            self.debugger_events = []
+            debugger = ManagedDebugger(self._debugger_step)
+            debugger.run(TEST_OPAQUE_SCRIPT)
+        finally:
+            settings.OPAQUE_FUNCTIONS = old_opaque_functions
+
+        for event, args, kwargs in self.debugger_events:
+            assert kwargs['frame'].f_code.co_name == '<module>'
+
+    def test_frames(self):
+        stacks = []
+
+        def handler(event, *args, **kwargs):
+            stacks.append([f.f_code.co_name for f in debugger.frames])
+
+        debugger = ManagedDebugger(handler)
+        debugger.run(TEST_NESTED_SCRIPT)
+
+        assert ['<module>', 'outer', 'fail'] in stacks
+        assert stacks[-2] == ['<module>', 'outer']
+        assert stacks[-1] == ['<module>']
+
+        for stack in stacks:
+            assert stack[0] == '<module>'
+
+        assert list(debugger.frames) == []
@@ -0,0 +1,37 @@
+import sys
+
+import unittest2
+
+from pytrace.conf import settings
+from pytrace.core.frames import FrameSnapshot, filter_vars_dict
+
+
+def get_frame(a, b=2):
+    __doc__ = 'ignored'  # NOQA
+    return sys._getframe()
+
+
+class FrameSnapshotTests(unittest2.TestCase):
+
+    def test_filter_vars_dict(self):
+        vars_dict = {'a': 1, '__name__': 'x'}
+        self.assertEqual(filter_vars_dict(vars_dict), {'a': 1})
+        self.assertEqual(vars_dict, {'a': 1, '__name__': 'x'})
+
+    def test_locals(self):
+        snapshot = FrameSnapshot(get_frame(1))
+        self.assertEqual(snapshot.locals, {'a': 1, 'b': 2})
+        self.assertIn('__doc__', snapshot.frame_locals)
+        self.assertEqual(snapshot.info.arguments, ('a', 'b'))
+
+    def test_globals(self):
+        snapshot = FrameSnapshot(get_frame(1))
+        self.assertIs(snapshot.globals['FrameSnapshot'], FrameSnapshot)
+        for name in settings.IGNORE_VARS:
+            self.assertNotIn(name, snapshot.globals)
+
+    def test_read_once(self):
+        snapshot = FrameSnapshot(get_frame(1))
+        self.assertIs(snapshot.locals, snapshot.locals)
+        self.assertIs(snapshot.globals, snapshot.globals)
+        self.assertIs(snapshot.frame_locals, snapshot.frame_locals)
@@ -1,6 +1,9 @@
+import pickle
+
 import unittest2
 
-from pytrace.core.heap import Heap
+from pytrace.core.heap import Heap, HeapId
+from pytrace.json import dumps
 
 
 class HeapTests(unittest2.TestCase):
@@ -13,8 +16,12 @@ class HeapTests(unittest2.TestCase):
     def test_generated_uid(self):
         store = Heap()
         uid = store.store([1, 2, 3])
-        self.assertIsInstance(uid, str)
-        self.assertEqual(uid, "0x1")
+        self.assertIsInstance(uid, HeapId)
+        self.assertEqual(uid, '0x1')
+        self.assertEqual(dumps(uid), '"0x1"')
+        self.assertEqual(dumps({uid: [uid]}), '{"0x1": ["0x1"]}')
+        self.assertEqual(store["0x1"], [1, 2, 3])
+        self.assertEqual(pickle.loads(pickle.dumps(uid)), uid)
 
     def test_duplicate_item(self):
         store = Heap()
@@ -32,3 +39,14 @@ class HeapTests(unittest2.TestCase):
 
         store.reset()
         self.assertEqual(len(store), 1)  # Const must be there
+
+    def test_steps(self):
+        store = Heap()
+        item = [1, 2, 3]
+        uid = store.store(item)
+
+        store.reset()
+        self.assertRaises(KeyError, lambda: store[uid])
+        self.assertEqual(store.get_variables(), {})
+        self.assertEqual(store.store(item), uid)
+        self.assertEqual(store.get_variables(), {uid: item})
@@ -0,0 +1,106 @@
+import unittest2
+
+from pytrace.core.debugger import (
+    ManagedDebugger, DebuggerEvent, is_monitoring_available, get_debugger_class
+)
+
+
+LOOP_SCRIPT = """
+import json
+total = 0
+for i in range(3):
+    total += i
+    data = json.dumps([i, total])
+
+raise ValueError(total)
+"""
+
+# Loops and comprehensions on a single line step to the same line again
+ONE_LINE_LOOPS_SCRIPT = """
+x = 0
+for i in range(3): x += i
+i = 0
+while i < 3: i += 1
+y = [i * 2 for i in range(3)]
+d = {k: k for k in range(3) if k}
+"""
+
+CALLBACKS_SCRIPT = """
+def f(a):
+    return a + 1
+
+y = [f(i) for i in range(2)]
+z = list(map(lambda a: a + 1, range(3)))
+k = sorted([3, 1, 2], key=lambda v: -v)
+for i in range(2): f(i)
+
+def g(n):
+    for i in range(n): yield f(i)
+
+s = sum(g(3))
+"""
+
+# Generator left by `break` is closed, which throws `GeneratorExit` into it
+GENERATOR_CLOSE_SCRIPT = """
+def g(n):
+    try:
+        for i in range(n):
+            yield i
+    finally:
+        done = True
+
+for v in g(5):
+    if v == 1:
+        break
+x = v
+"""
+
+SCRIPTS = (LOOP_SCRIPT, ONE_LINE_LOOPS_SCRIPT, CALLBACKS_SCRIPT,
+           GENERATOR_CLOSE_SCRIPT)
+
+
+@unittest2.skipUnless(is_monitoring_available(), "requires sys.monitoring")
+class MonitoringDebuggerTests(unittest2.TestCase):
+
+    def run_script(self, debugger_class, script):
+        events = []
+
+        def handler(event, *args, **kwargs):
+            events.append((event, kwargs))
+
+        debugger_class(handler).run(script)
+        return events
+
+    def setUp(self):
+        from pytrace.core.monitoring import MonitoringDebugger
+        self.debugger_class = MonitoringDebugger
+
+    def test_auto_backend(self):
+        self.assertIs(get_debugger_class('auto'), self.debugger_class)
+        self.assertIs(get_debugger_class('bdb'), ManagedDebugger)
+
+    def test_hello_world(self):
+        events = self.run_script(self.debugger_class, "print ('Hello Wolrd')")
+        self.assertEqual([e for e, _ in events],
+                         [DebuggerEvent.StepLine, DebuggerEvent.ExitBlock])
+
+    def test_syntax_error(self):
+        events = self.run_script(self.debugger_class, "print 'Hello Wolrd")
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0][0], DebuggerEvent.SyntaxError)
+
+    def get_steps(self, debugger_class, script):
+        steps = []
+        for event, kwargs in self.run_script(debugger_class, script):
+            frame = kwargs.get('frame')  # i.e. SystemError doesn't have any
+            if frame is None:
+                steps.append((event, None, None))
+            else:
+                steps.append((event, frame.f_code.co_name, frame.f_lineno))
+
+        return steps
+
+    def test_same_events(self):
+        for script in SCRIPTS:
+            self.assertEqual(self.get_steps(ManagedDebugger, script),
+                             self.get_steps(self.debugger_class, script))
@@ -0,0 +1,15 @@
+import pickle
+
+import unittest2
+
+from pytrace.core.records import Step, StackFrame
+
+
+class RecordTests(unittest2.TestCase):
+
+    def test_pickle(self):
+        step = Step(name='f', line_number=3, stack=[StackFrame(uid=1)])
+        copied = pickle.loads(pickle.dumps(step, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(copied, step)
+        self.assertNotIn('heap', copied)
+
@@ -44,6 +44,16 @@ class SandboxTests(unittest2.TestCase):
         finally:
             settings.REDIRECT_STDOUT = old_redirect_stdout
 
+    def test_stdout_offset(self):
+        old_redirect_stdout = settings.REDIRECT_STDOUT
+        settings.REDIRECT_STDOUT = True
+        try:
+            sandbox = Sandbox()
+            sandbox.run('print ("Hello")\nprint ("World")')
+            assert sandbox.stdout_offset == len("Hello\nWorld\n")
+        finally:
+            settings.REDIRECT_STDOUT = old_redirect_stdout
+
     def test_system_exit(self):
         sandbox = Sandbox()
         sandbox.run('raise SystemExit()')
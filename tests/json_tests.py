@@ -0,0 +1,43 @@
+import json
+import unittest2
+
+from six import StringIO
+
+import pytrace
+from pytrace.json import dumps, dump_stream, load_stream
+
+
+LOOP_SCRIPT = """
+items = []
+for i in range(5):
+    items.append(i)
+    print (i)
+"""
+
+
+class DumpStreamTests(unittest2.TestCase):
+
+    def test_dump_trace(self):
+        trace = pytrace.trace(LOOP_SCRIPT)
+        fileobj = StringIO()
+        dump_stream(trace, fileobj)
+
+        lines = fileobj.getvalue().splitlines()
+        self.assertEqual(len(lines), len(trace['steps']) + 1)
+        self.assertEqual(json.loads(lines[1])['event'], 'StepLine')
+
+        fileobj.seek(0)
+        self.assertEqual(load_stream(fileobj), json.loads(dumps(trace)))
+
+    def test_dump_iterator(self):
+        trace = json.loads(dumps(pytrace.trace(LOOP_SCRIPT)))
+        fileobj = StringIO()
+        dump_stream(pytrace.iter_trace(LOOP_SCRIPT), fileobj)
+
+        fileobj.seek(0)
+        streamed_trace = load_stream(fileobj)
+        self.assertEqual(streamed_trace['scriptLines'], trace['scriptLines'])
+        self.assertEqual(streamed_trace['refs'], trace['refs'])
+        self.assertEqual(streamed_trace['output'], trace['output'])
+        self.assertEqual([e['heap'] for e in streamed_trace['steps']],
+                         [e['heap'] for e in trace['steps']])
@@ -9,7 +9,6 @@ class SerializerTestCase(unittest2.TestCase):
     def setUp(self):
         self.serializer = self.serializer_class()
         self.parent_serializer = ObjectSerializer()
-        self.serializer.parent = self.parent_serializer
 
     def assertContains(self, container, *items):
         for item in items:
@@ -21,7 +20,7 @@ class SerializerTestCase(unittest2.TestCase):
         self.assertEqual(encoded_value['module'], type_.__module__)
 
     def serialize(self, value):
-        response = self.serializer.serialize(value)
+        response = self.serializer.serialize(value, self.parent_serializer)
         self.assertContains(response, 'type', 'value', 'name')
         self.assertEncodedType(response['type'], type(value))
         return response['value']
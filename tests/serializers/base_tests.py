@@ -0,0 +1,103 @@
+import unittest2
+
+from pytrace.conf import settings
+from pytrace.serializers import ObjectSerializer
+from pytrace.serializers.base import PersistentObjectSerializer
+
+
+class _Node(object):
+    pass
+
+
+class BudgetTests(unittest2.TestCase):
+
+    serializer_class = ObjectSerializer
+
+    budgets = {
+        'MAX_ENCODING_DEPTH': 3,
+        'MAX_HEAP_ENTRIES': 10,
+        'MAX_COLLECTION_ELEMENTS': 4,
+        'MAX_REPR_LENGTH': 10
+    }
+
+    def setUp(self):
+        self.old_settings = {k: getattr(settings, k) for k in self.budgets}
+        for k, v in self.budgets.items():
+            setattr(settings, k, v)
+
+        self.serializer = self.serializer_class()
+
+    def tearDown(self):
+        for k, v in self.old_settings.items():
+            setattr(settings, k, v)
+
+    def encode(self, value):
+        return self.serializer.heap[self.serializer.encode(value)]['value']
+
+    def test_max_depth(self):
+        innermost = ['x']
+        value = [[innermost]]
+
+        encoded_value = self.encode([value])
+        heap = self.serializer.heap
+        inner = heap[heap[heap[encoded_value[0]]['value'][0]]['value'][0]]
+        self.assertEqual(inner['value'], {'truncated': heap.get_id(innermost)})
+
+    def test_max_heap_entries(self):
+        encoded_value = self.encode([[str(i)] for i in range(4)])
+        entries = [self.serializer.heap[e]['value'] for e in encoded_value]
+        self.assertEqual(len([e for e in entries if 'truncated' in e]), 0)
+
+        self.serializer.reset()
+        encoded_value = self.encode([[str(i), str(i + 1)] for i in range(4)])
+        entries = [self.serializer.heap[e]['value'] for e in encoded_value]
+        self.assertIn('truncated', entries[-1])
+
+    def test_max_collection_elements(self):
+        value = [str(e) for e in range(20)]
+        encoded_value = self.encode(value)
+        self.assertEqual(len(encoded_value), 5)
+        self.assertEqual(encoded_value[-1], {
+            'truncated': self.serializer.heap.get_id(value),
+            'length': 20
+        })
+
+        encoded_value = self.encode(list(range(100)))
+        self.assertEqual(encoded_value['values'], [0, 1, 2, 3])
+        self.assertEqual(encoded_value['length'], 100)
+
+        encoded_value = self.encode({str(e): e for e in range(20)})
+        self.assertEqual(len(encoded_value), 5)
+        self.assertEqual(encoded_value['...']['length'], 20)
+
+    def test_max_repr_length(self):
+        self.assertEqual(self.encode('abc'), repr('abc'))
+
+        encoded_value = self.encode('a' * 20)
+        self.assertEqual(encoded_value['repr'], repr('a' * 20)[:10])
+        self.assertEqual(encoded_value['length'], 22)
+
+    def test_self_reference(self):
+        node = _Node()
+        node.next = node
+
+        encoded_value = self.encode(node)
+        self.assertEqual(encoded_value['attributes']['next'],
+                         self.serializer.heap.get_id(node))
+
+
+class PersistentBudgetTests(BudgetTests):
+
+    serializer_class = PersistentObjectSerializer
+
+    def test_truncated_not_retained(self):
+        value = [[['x']]]
+        self.encode([value])
+
+        settings.MAX_ENCODING_DEPTH = None
+        self.serializer.reset()
+        self.encode([value])
+
+        entries = self.serializer.heap.get_variables().values()
+        self.assertEqual(len(entries), 4)
+        self.assertTrue(all(isinstance(e['value'], list) for e in entries))
@@ -27,7 +27,7 @@ class TypeSerializerTests(SerializerTestCase):
     serializer_class = builtins.TypeSerializer
 
     def test_serialization(self):
-        encoded_value = self.serializer.serialize(int)
+        encoded_value = self.serializer.serialize(int, self.parent_serializer)
         self.assertEncodedType(encoded_value, int)
 
 
@@ -92,3 +92,38 @@ class ClassSerializerTests(SerializerTestCase):
         encoded_value = self.serialize(type(self))
         self.assertContains(encoded_value, 'super', 'attributes')
         self.assertEquals(len(encoded_value['super']), 1)
+
+
+class _Point(object):
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class _SlottedPoint(object):
+    __slots__ = ('x', 'y', '__secret')
+
+    def __init__(self, x):
+        self.x = x
+        self.__secret = 1
+
+
+class InstanceSerializerTests(SerializerTestCase):
+
+    serializer_class = builtins.InstanceSerializer
+
+    def test_serialization(self):
+        encoded_value = self.serialize(_Point(1, 2))
+        self.assertContains(encoded_value, 'class', 'attributes')
+        self.assertEqual(sorted(encoded_value['attributes']), ['x', 'y'])
+
+    def test_layout_cache(self):
+        layout = self.serializer.get_layout(_Point(1, 2))
+        self.assertIs(self.serializer.get_layout(_Point(3, 4)), layout)
+        self.assertEqual(layout, ('x', 'y'))
+
+    def test_slots(self):
+        encoded_value = self.serialize(_SlottedPoint(1))
+        self.assertEqual(sorted(encoded_value['attributes']),
+                         ['_SlottedPoint__secret', 'x'])
@@ -1,4 +1,7 @@
-from pytrace.serializers import collections
+import array
+
+from pytrace.conf import settings
+from pytrace.serializers import arrays, collections
 
 from . import SerializerTestCase
 
@@ -33,6 +36,44 @@ class CollectionSerializerTests(SerializerTestCase):
         inner_list = self.parent_serializer.get_object_by_id(encoded_value[0])
         self.assertEqual(inner_list['value'][1], "[...]")
 
+    def test_repeated_list(self):
+        lst = [1]
+        encoded_value = self.serialize([lst, lst])
+        self.assertEqual(encoded_value[0], encoded_value[1])
+
+    def test_typed_array(self):
+        encoded_value = self.serialize(list(range(100)))
+        self.assertEqual(encoded_value['dtype'], 'int')
+        self.assertEqual(encoded_value['values'], list(range(100)))
+        self.assertEqual(len(self.parent_serializer.heap), 0)
+
+        encoded_value = self.serialize(tuple([0.5] * 20))
+        self.assertEqual(encoded_value,
+                         {'dtype': 'float', 'values': [0.5] * 20})
+
+    def test_typed_array_not_used(self):
+        self.assertIsInstance(self.serialize([True] + [1] * 20), list)
+        self.assertIsInstance(self.serialize([float('nan')] * 20), list)
+
+        old_min_length = settings.TYPED_ARRAY_MIN_LENGTH
+        settings.TYPED_ARRAY_MIN_LENGTH = None
+        try:
+            self.assertEqual(len(self.serialize(list(range(100)))), 100)
+        finally:
+            settings.TYPED_ARRAY_MIN_LENGTH = old_min_length
+
+
+class ArraySerializerTests(SerializerTestCase):
+
+    serializer_class = arrays.ArraySerializer
+
+    def test_serialization(self):
+        encoded_value = self.serialize(array.array('i', [1, 2, 3]))
+        self.assertEqual(encoded_value, {'dtype': 'int', 'values': [1, 2, 3]})
+
+        encoded_value = self.serialize(array.array('d', [0.5]))
+        self.assertEqual(encoded_value, {'dtype': 'float', 'values': [0.5]})
+
 
 class DictionarySerializerTests(SerializerTestCase):
 
@@ -48,3 +89,28 @@ class DictionarySerializerTests(SerializerTestCase):
         encoded_value = self.serialize(dct)
         e2 = list(encoded_value.keys())[1]
         self.assertEqual(encoded_value[e2], "{...}")
+
+
+class SubclassSerializationTests(SerializerTestCase):
+
+    serializer_class = collections.CollectionSerializer
+
+    def test_registry_resolves_mro(self):
+        from collections import OrderedDict
+        from pytrace.serializers.registry import default as registry
+
+        class Stack(list):
+            pass
+
+        serializer = registry.resolve(Stack)
+        self.assertIsInstance(serializer, collections.CollectionSerializer)
+        self.assertIs(serializer, registry.resolve(list))
+        self.assertIsInstance(registry.resolve(OrderedDict),
+                              collections.DictionarySerializer)
+
+    def test_subclass_serialization(self):
+        class Stack(list):
+            pass
+
+        encoded_value = self.serialize(Stack([1, 2]))
+        self.assertEqual(len(encoded_value), 2)
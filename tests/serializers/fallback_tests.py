@@ -1,4 +1,5 @@
 from pytrace.serializers import fallback
+from pytrace.serializers.registry import default as registry
 from pytrace.core.builtins import InputFunction, ImportStatement
 from six import PY2
 
@@ -25,7 +26,7 @@ class FallbackSerializerTests(SerializerTestCase):
 
     def test_mocked_import(self):
         statement = ImportStatement()
-        results = self.serializer.serialize(statement)
+        results = self.serializer.serialize(statement, self.parent_serializer)
         self.assertEncodedType(results["type"], type(__import__))
         self.assertEqual(results["name"], "__import__")
 
@@ -35,7 +36,7 @@ class FallbackSerializerTests(SerializerTestCase):
 
     def test_mocked_input(self):
         function = InputFunction()
-        results = self.serializer.serialize(function)
+        results = self.serializer.serialize(function, self.parent_serializer)
         input_func = __builtins__['raw_input' if PY2 else 'input']
         self.assertEncodedType(results["type"], type(input_func))
         self.assertEqual(results["name"], input_func.__name__)
@@ -43,3 +44,13 @@ class FallbackSerializerTests(SerializerTestCase):
         encoded_value = results["value"]
         self.assertContains(encoded_value, "help")
         self.assertEqual(encoded_value["help"], function.__doc__)
+
+    def test_metaclass_instance(self):
+        Meta = type('Meta', (type,), {})
+        Klass = Meta('Klass', (object,), {'x': 1})
+        self.assertIsInstance(registry.resolve(Meta),
+                              fallback.FallbackSerializer)
+
+        encoded_value = self.serialize(Klass)
+        self.assertContains(encoded_value, 'super', 'attributes')
+        self.assertIn('x', encoded_value['attributes'])
@@ -0,0 +1,90 @@
+import random
+import unittest2
+
+from pytrace.json import dumps
+from pytrace.session import TraceSession
+from pytrace.tracer import ControlledTraceRecorder
+
+
+SCRIPT = """
+import random
+
+class Node(object):
+    def __init__(self, value, next=None):
+        self.value = value
+        self.next = next
+
+head = None
+for i in range(3):
+    head = Node([random.randint(0, 100)], head)
+
+items = [[1, [2, [3]]], 'text']
+"""
+
+
+class TraceSessionTests(unittest2.TestCase):
+
+    def get_shallow_entries(self, session, step):
+        return {
+            k: v for k, v in session.trace['steps'][step]['heap'].items()
+            if isinstance(v.get('value'), dict) and 'truncated' in v['value']
+        }
+
+    def test_shallow_trace(self):
+        session = TraceSession(SCRIPT)
+        truncated = self.get_shallow_entries(session, -1)
+        self.assertTrue(truncated)
+
+        full = ControlledTraceRecorder().run(SCRIPT)
+        self.assertLess(len(dumps(session.trace)), len(dumps(full)))
+
+    def test_get_object(self):
+        session = TraceSession(SCRIPT)
+        step = len(session.trace['steps']) - 1
+        steps_heap = session.trace['steps'][step]['heap']
+
+        for heap_id, entry in self.get_shallow_entries(session, step).items():
+            heap = session.get_object(step, heap_id)
+            self.assertEqual(heap[heap_id]['name'], entry['name'])
+            self.assertEqual(heap[heap_id]['type'], entry['type'])
+            self.assertNotIn('truncated', heap[heap_id]['value'])
+
+            for key in set(heap).intersection(steps_heap):
+                self.assertEqual(heap[key].get('type'),
+                                 steps_heap[key].get('type'))
+
+    def test_deterministic_execution(self):
+        random.seed(5)
+        expected = [random.randint(0, 100) for i in range(3)]
+
+        session = TraceSession(SCRIPT, seed=5)
+        step = len(session.trace['steps']) - 1
+        steps_heap = session.trace['steps'][step]['heap']
+        head = steps_heap[session.trace['steps'][step]['globals']['head']]
+        values = head['value']['attributes']['value']
+
+        heap = session.get_object(step, values)
+        self.assertEqual(heap[heap[values]['value'][0]]['value'],
+                         repr(expected[-1]))
+
+    def test_get_object_depth(self):
+        session = TraceSession(SCRIPT)
+        step = len(session.trace['steps']) - 1
+        items = session.trace['steps'][step]['globals']['items']
+        inner = session.trace['steps'][step]['heap'][items]['value'][0]
+
+        heap = session.get_object(step, inner, depth=1)
+        self.assertEqual(len(heap[inner]['value']), 2)
+        truncated = [
+            e for e in heap.values()
+            if isinstance(e.get('value'), dict) and 'truncated' in e['value']
+        ]
+        self.assertEqual(len(truncated), 1)
+
+    def test_get_missing_object(self):
+        session = TraceSession(SCRIPT)
+        with self.assertRaises(KeyError):
+            session.get_object(0, 10 ** 6)
+
+        with self.assertRaises(IndexError):
+            session.get_object(len(session.trace['steps']), 1)
@@ -1,6 +1,26 @@
 import unittest2
+from six import PY2
 
+from pytrace.core.debugger import DebuggerEvent
+from pytrace.tracer import (
+    ControlledTraceRecorder, DeltaTraceRecorder, InternedTraceRecorder,
+    PersistentTraceRecorder
+)
 from pytrace.tracer.base import AbstractTraceRecorder
+from pytrace.tracer.delta import iter_decoded_steps
+from pytrace.tracer.interning import iter_resolved_steps
+from pytrace.tracer.signals import SIGNALS
+from pytrace.tracer.utils import get_step_output
+
+
+RELEASED_LOCALS_SCRIPT = """
+def f(n):
+    s = str(n) * 3
+    t = (n, s)
+    return len(s)
+for i in range(6):
+    f(i)
+"""
 
 
 class SerializerTestCase(unittest2.TestCase):
@@ -8,3 +28,223 @@ class SerializerTestCase(unittest2.TestCase):
     def test_hello_world(self):
         recorder = AbstractTraceRecorder()
         recorder.run("print ('Hello World')")
+
+    def test_output_offsets(self):
+        recorder = AbstractTraceRecorder()
+        trace = recorder.run("for i in range(3):\n    print (i)")
+        self.assertEqual(trace['output'], "0\n1\n2\n")
+
+        offsets = [e['outputOffset'] for e in trace['steps']]
+        self.assertEqual(offsets, sorted(offsets))
+        self.assertEqual(get_step_output(trace, trace['steps'][-1]),
+                         trace['output'])
+
+    def test_deeply_nested_value(self):
+        # Class bodies aren't traced, so nesting is built in a single step
+        script = (
+            "class Builder(object):\n"
+            "    value = []\n"
+            "    for i in range(5000):\n"
+            "        value = [value]\n"
+            "nested = Builder.value\n"
+        )
+        trace = AbstractTraceRecorder().run(script)
+        heap = trace['steps'][-1]['heap']
+        self.assertTrue(any('truncated' in e['value'] for e in heap.values()
+                            if isinstance(e['value'], dict)))
+
+    def test_suspended_frame_locals(self):
+        # `a` is bound while `caller` is suspended by calls on the same line
+        script = (
+            "def value(x):\n"
+            "    return [x]\n"
+            "def caller():\n"
+            "    a = value(1); b = value(2)\n"
+            "    return a + b\n"
+            "caller()\n"
+        )
+        trace = AbstractTraceRecorder().run(script)
+        steps = [e for e in trace['steps'] if e['stack']]
+        bound = [list(e['stack'][-1]['locals']) for e in steps]
+        self.assertIn(['a'], bound)
+        self.assertEqual(bound[-1], ['a', 'b'])
+
+        for step in steps:
+            for frame in step['stack']:
+                for heap_id in frame['locals'].values():
+                    self.assertTrue(heap_id in step['heap'] or
+                                    heap_id in trace['refs'])
+
+    @unittest2.skipIf(PY2, "nonlocal isn't supported")
+    def test_suspended_frame_cells(self):
+        # `n` of `outer` is rebound by `inc` while `outer` is suspended
+        script = (
+            "def outer():\n"
+            "    n = 0\n"
+            "    def inc():\n"
+            "        nonlocal n\n"
+            "        n += 1\n"
+            "        return n\n"
+            "    inc(); inc()\n"
+            "    return n\n"
+            "outer()\n"
+        )
+        trace = AbstractTraceRecorder().run(script)
+        refs = trace['refs']
+        for step in trace['steps']:
+            stack = step['stack']
+            if len(stack) != 2:
+                continue
+
+            inner, outer = stack
+            self.assertEqual(refs[inner['locals']['n']],
+                             refs[outer['locals']['n']])
+
+    def test_exited_frames_released(self):
+        sizes = []
+
+        class Recorder(AbstractTraceRecorder):
+            def _append_trace(self, encoded_frame):
+                sizes.append(len(self._frame_ordered_ids))
+                super(Recorder, self)._append_trace(encoded_frame)
+
+        recorder = Recorder()
+        recorder.run(
+            "def square(x):\n"
+            "    return x * x\n"
+            "for i in range(20):\n"
+            "    square(i)\n"
+        )
+        self.assertEqual(max(sizes), 1)
+        self.assertEqual(len(recorder._frame_ordered_ids), 0)
+        self.assertEqual(len(recorder._encoded_frames), 0)
+
+    def test_closure_parent(self):
+        trace = AbstractTraceRecorder().run(
+            "def make(k):\n"
+            "    def add(x):\n"
+            "        return x + k\n"
+            "    return add\n"
+            "adder = make(2)\n"
+            "y = adder(3)\n"
+        )
+        step = trace['steps'][-1]
+        make = trace['refs'][step['globals']['make']]
+        adder = trace['refs'][step['globals']['adder']]
+
+        self.assertIsNone(make['value']['parent'])
+        self.assertEqual(adder['value']['parent'], step['globals']['make'])
+
+    def test_returned_closure_parent(self):
+        recorder = AbstractTraceRecorder()
+        trace = recorder.run(
+            "def make(k):\n"
+            "    data = [{'k': [k]} for i in range(3)]\n"
+            "    return lambda x: x + k\n"
+            "adder = make(2)\n"
+        )
+        step = trace['steps'][-1]
+        adder = trace['refs'][step['globals']['adder']]
+        self.assertEqual(adder['value']['parent'], step['globals']['make'])
+
+        uids = set(e['stack'][0]['uid'] for e in trace['steps']
+                   if e['stack'] and e['stack'][0]['name'] == 'make')
+        func = recorder._debugger._sandbox._locals['adder']
+        self.assertEqual(set([recorder.get_func_parent_frame_id(func)]), uids)
+
+    def test_contained_closure_parent(self):
+        recorder = AbstractTraceRecorder()
+        trace = recorder.run(
+            "def make(k, handlers):\n"
+            "    def add(x):\n"
+            "        return x + k\n"
+            "    handlers.append(lambda: k)\n"
+            "    return {'f': add}\n"
+            "handlers = []\n"
+            "adders = make(2, handlers)\n"
+        )
+        step = trace['steps'][-1]
+        refs = trace['refs']
+        heap = step['heap']
+        make = step['globals']['make']
+        adders = heap[step['globals']['adders']]['value']
+        funcs = [refs[list(adders.values())[0]],
+                 refs[heap[step['globals']['handlers']]['value'][0]]]
+        for func in funcs:
+            self.assertEqual(func['value']['parent'], make)
+
+        uids = set(e['stack'][0]['uid'] for e in trace['steps']
+                   if e['stack'] and e['stack'][0]['name'] == 'make')
+        sandbox_locals = recorder._debugger._sandbox._locals
+        for func in (sandbox_locals['adders']['f'],
+                     sandbox_locals['handlers'][0]):
+            self.assertEqual(set([recorder.get_func_parent_frame_id(func)]),
+                             uids)
+
+    def test_closures_of_same_maker(self):
+        recorder = AbstractTraceRecorder()
+        trace = recorder.run(
+            "def make(k):\n"
+            "    def add(x):\n"
+            "        return x + k\n"
+            "    return add\n"
+            "a = make(1)\n"
+            "b = make(2)\n"
+        )
+        uids = [e['stack'][0]['uid'] for e in trace['steps']
+                if e['stack'] and e['stack'][0]['name'] == 'make']
+        sandbox_locals = recorder._debugger._sandbox._locals
+        self.assertEqual(
+            [recorder.get_func_parent_frame_id(sandbox_locals['a']),
+             recorder.get_func_parent_frame_id(sandbox_locals['b'])],
+            sorted(set(uids))
+        )
+
+    def test_snapshot_shared(self):
+        received = []
+
+        def receiver(sender, frame, snapshot, **kwargs):
+            received.append(snapshot)
+            self.assertIs(snapshot.frame, frame)
+            self.assertIs(recorder.snapshot, snapshot)
+            self.assertIs(recorder._serializer.snapshot, snapshot)
+
+        recorder = AbstractTraceRecorder()
+        signal = SIGNALS[DebuggerEvent.StepLine]
+        signal.connect(receiver)
+        try:
+            recorder.run("x = 1\ny = 2\n")
+        finally:
+            signal.disconnect(receiver)
+
+        self.assertEqual(len(received), 2)
+        self.assertIsNot(received[0], received[1])
+        self.assertIsNone(recorder.snapshot)
+
+    def test_released_locals(self):
+        recorders = (
+            (ControlledTraceRecorder, lambda trace: trace['steps']),
+            (DeltaTraceRecorder, lambda t: iter_decoded_steps(t['steps'])),
+            (PersistentTraceRecorder,
+             lambda trace: iter_decoded_steps(trace['steps'])),
+            (InternedTraceRecorder, iter_resolved_steps)
+        )
+
+        for recorder_class, get_steps in recorders:
+            trace = recorder_class().run(RELEASED_LOCALS_SCRIPT)
+            refs = trace['refs']
+            calls = set()
+            for step in get_steps(trace):
+                stack = step['stack']
+                if not stack or 't' not in stack[0]['locals']:
+                    continue
+
+                frame_locals = stack[0]['locals']
+                n, s = refs[frame_locals['n']], refs[frame_locals['s']]
+                t = [refs[e]['value']
+                     for e in refs[frame_locals['t']]['value']]
+                self.assertEqual(t, [n['value'], s['value']],
+                                 recorder_class.__name__)
+                calls.add(n['value'])
+
+            self.assertEqual(len(calls), 6)
@@ -0,0 +1,81 @@
+import json
+import unittest2
+
+from pytrace.json import dumps
+from pytrace.tracer import ControlledTraceRecorder, DeltaTraceRecorder
+from pytrace.tracer import delta
+
+
+LOOP_SCRIPT = """
+items = []
+for i in range(10):
+    items.append(i)
+    total = sum(items)
+
+del total
+print(items)
+"""
+
+
+class DeltaTraceRecorderTests(unittest2.TestCase):
+
+    def record(self, recorder_class, **options):
+        return recorder_class(**options).run(LOOP_SCRIPT)['steps']
+
+    def assertStepsEqual(self, expected, actual):
+        self.assertEqual(len(expected), len(actual))
+        for expected_step, actual_step in zip(expected, actual):
+            self.assertEqual(json.loads(dumps(expected_step)),
+                             json.loads(dumps(actual_step)))
+
+    def test_keyframes(self):
+        steps = self.record(DeltaTraceRecorder, keyframe_interval=5)
+        frames = [
+            e for e in steps
+            if delta.is_keyframe(e) or delta.is_delta(e)
+        ]
+        self.assertGreater(len(frames), 5)
+        for i, step in enumerate(frames):
+            self.assertEqual(delta.is_keyframe(step), i % 5 == 0)
+            self.assertEqual(delta.is_delta(step), i % 5 != 0)
+
+    def test_decode_all_steps(self):
+        expected = self.record(ControlledTraceRecorder)
+        steps = self.record(DeltaTraceRecorder, keyframe_interval=4)
+        self.assertStepsEqual(expected, list(delta.iter_decoded_steps(steps)))
+
+    def test_decode_step(self):
+        expected = self.record(ControlledTraceRecorder)
+        steps = self.record(DeltaTraceRecorder, keyframe_interval=4)
+        self.assertStepsEqual(expected, [
+            delta.decode_step(steps, i)
+            for i in reversed(range(len(steps)))
+        ][::-1])
+
+    def test_decode_json_steps(self):
+        expected = self.record(ControlledTraceRecorder)
+        steps = json.loads(dumps(self.record(DeltaTraceRecorder)))
+        self.assertStepsEqual(expected, list(delta.iter_decoded_steps(steps)))
+
+    def test_delta_size(self):
+        full = self.record(ControlledTraceRecorder)
+        steps = self.record(DeltaTraceRecorder)
+        self.assertLess(len(dumps(steps)), len(dumps(full)))
+
+
+class DeltaEncodingTests(unittest2.TestCase):
+
+    def test_bindings_order(self):
+        old = {'a': 1}
+        new = {'b': 2, 'a': 1}
+        changes = delta.diff_bindings(old, new)
+        self.assertIn('replace', changes)
+        self.assertEqual(list(delta.apply_bindings(old, changes)), ['b', 'a'])
+
+    def test_stack_push_pop(self):
+        old = [{'uid': 2, 'locals': {'x': '0x1'}}, {'uid': 1, 'locals': {}}]
+        new = [{'uid': 3, 'locals': {}}, {'uid': 1, 'locals': {'y': '0x2'}}]
+        changes = delta.diff_stack(old, new)
+        self.assertEqual(changes['pop'], 2 - 1)
+        self.assertEqual(changes['push'], new[:1])
+        self.assertEqual(delta.apply_stack(old, changes), new)
@@ -0,0 +1,91 @@
+import json
+import unittest2
+
+from six import StringIO
+
+from pytrace.core.interning import InternTable
+from pytrace.json import dumps, dump_stream, load_stream
+from pytrace.tracer import ControlledTraceRecorder, InternedTraceRecorder
+from pytrace.tracer import interning
+
+
+SCRIPT = """
+items = list(range(1000))
+total = 0
+for i in range(50):
+    total += 1
+"""
+
+MUTATING_SCRIPT = """
+items = [[1, 2], {'a': 1}]
+for i in range(3):
+    items[0].append(i)
+    items[1]['a'] = i
+"""
+
+
+class InternTableTests(unittest2.TestCase):
+
+    def test_shared_subtrees(self):
+        table = InternTable()
+        first = table.intern({'type': {'name': 'list'}, 'value': ['0x1']})
+        second = table.intern({'type': {'name': 'list'}, 'value': ['0x2']})
+
+        self.assertIsNot(first, second)
+        self.assertIs(first['type'], second['type'])
+        self.assertIs(table.intern([first]), table.intern([dict(first)]))
+
+    def test_leaf_types(self):
+        table = InternTable()
+        self.assertIsNot(table.intern([1]), table.intern([True]))
+        self.assertIsNot(table.intern([1]), table.intern(['1']))
+        self.assertEqual(table.intern([None, 1.5]), [None, 1.5])
+
+    def test_index(self):
+        table = InternTable()
+        index = table.index({'value': [1, 2]})
+        self.assertEqual(index, table.index({'value': [1, 2]}))
+        self.assertNotEqual(index, table.index({'value': [2, 1]}))
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.values[index], {'value': [1, 2]})
+
+
+class InternedTraceRecorderTests(unittest2.TestCase):
+
+    def assertStepsEqual(self, expected, actual):
+        self.assertEqual(len(expected), len(actual))
+        for expected_step, actual_step in zip(expected, actual):
+            self.assertEqual(json.loads(dumps(expected_step)),
+                             json.loads(dumps(actual_step)))
+
+    def test_unchanged_value_stored_once(self):
+        trace = InternedTraceRecorder().run(SCRIPT)
+        self.assertGreater(len(trace['steps']), 100)
+
+        lists = [
+            e for e in trace['values']
+            if isinstance(e['value'], dict) and
+            len(e['value'].get('values', ())) == 1000
+        ]
+        self.assertEqual(len(lists), 1)
+
+    def test_resolve_steps(self):
+        expected = ControlledTraceRecorder().run(MUTATING_SCRIPT)
+        trace = InternedTraceRecorder().run(MUTATING_SCRIPT)
+        self.assertStepsEqual(expected['steps'],
+                              list(interning.iter_resolved_steps(trace)))
+
+    def test_stream(self):
+        expected = InternedTraceRecorder().run(MUTATING_SCRIPT)
+
+        stream = StringIO()
+        dump_stream(InternedTraceRecorder().iter_run(MUTATING_SCRIPT), stream)
+        stream.seek(0)
+        trace = load_stream(stream)
+
+        self.assertEqual(json.loads(dumps(expected['values'])),
+                         trace['values'])
+        self.assertStepsEqual(expected['steps'], [
+            {k: v for k, v in e.items() if k not in ('refs', 'values')}
+            for e in trace['steps']
+        ])
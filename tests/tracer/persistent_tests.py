@@ -0,0 +1,85 @@
+import json
+import unittest2
+
+from pytrace.json import dumps
+from pytrace.serializers.base import PersistentObjectSerializer
+from pytrace.tracer import ControlledTraceRecorder, PersistentTraceRecorder
+from pytrace.tracer import delta
+
+
+SCRIPT = """
+class Point(object):
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+def move(point, step):
+    point.x += step
+    return point
+
+rows = [[0] * 3 for i in range(3)]
+lookup = {'origin': Point(0, 0)}
+for i in range(5):
+    rows[i % 3][i % 3] = i
+    move(lookup['origin'], i)
+
+lookup['other'] = Point(1, 1)
+del rows[0]
+"""
+
+LARGE_HEAP_SCRIPT = """
+items = [[i] for i in range(50)]
+for i in range(10):
+    items[0].append(i)
+"""
+
+
+class PersistentTraceRecorderTests(unittest2.TestCase):
+
+    def assertStepsEqual(self, expected, actual):
+        self.assertEqual(len(expected), len(actual))
+        for expected_step, actual_step in zip(expected, actual):
+            self.assertEqual(json.loads(dumps(expected_step)),
+                             json.loads(dumps(actual_step)))
+
+    def test_decode_steps(self):
+        expected = ControlledTraceRecorder().run(SCRIPT)
+        trace = PersistentTraceRecorder(keyframe_interval=7).run(SCRIPT)
+        self.assertEqual(expected['refs'], trace['refs'])
+        self.assertStepsEqual(
+            expected['steps'], list(delta.iter_decoded_steps(trace['steps']))
+        )
+
+    def test_only_changes_recorded(self):
+        steps = PersistentTraceRecorder().run(LARGE_HEAP_SCRIPT)['steps']
+        deltas = [e['delta'] for e in steps if delta.is_delta(e)]
+        loop_deltas = deltas[-10:]
+        for e in loop_deltas:
+            self.assertLessEqual(len(e.get('heap', {}).get('set', {})), 1)
+
+    def test_unchanged_objects_not_encoded(self):
+        serializer = PersistentObjectSerializer()
+        value = [[1], [2], {'a': [3]}]
+
+        serializer.reset()
+        uid = serializer.encode(value)
+        first_entry = serializer.heap[uid]
+        serializer.heap.commit()
+
+        serializer.reset()
+        self.assertEqual(serializer.encode(value), uid)
+        self.assertIs(serializer.heap[uid], first_entry)
+        self.assertEqual(serializer.heap.commit(), {})
+
+        value[2]['a'].append(4)
+        serializer.reset()
+        serializer.encode(value)
+        self.assertIs(serializer.heap[uid], first_entry)
+        self.assertEqual(len(serializer.heap.commit()['set']), 1)
+
+        value.pop()
+        serializer.reset()
+        serializer.encode(value)
+        changes = serializer.heap.commit()
+        self.assertEqual(list(changes['set']), [uid])
+        self.assertEqual(len(changes['del']), 2)
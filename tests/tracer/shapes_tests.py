@@ -0,0 +1,93 @@
+import json
+import unittest2
+
+from six import StringIO
+
+from pytrace.core.records import HeapEntry
+from pytrace.core.shapes import ShapeTable, decode_heap, encode_heap
+from pytrace.json import dumps, dump_stream, load_stream
+from pytrace.tracer import ControlledTraceRecorder, ShapedTraceRecorder
+from pytrace.tracer import shapes
+
+
+SCRIPT = """
+class Node(object):
+    def __init__(self, value, next=None):
+        self.value = value
+        self.next = next
+
+head = None
+for i in range(5):
+    head = Node(i, head)
+
+head.extra = {'a': [1, 2]}
+"""
+
+
+def make_instance(class_id, **attributes):
+    return HeapEntry(
+        name='Node',
+        type={'name': 'Node', 'module': '__pytrace__'},
+        value={'class': class_id, 'attributes': attributes}
+    )
+
+
+class ShapeEncodingTests(unittest2.TestCase):
+
+    def test_encode_heap(self):
+        heap = {
+            1: make_instance(10, value=3, next=2),
+            2: make_instance(10, value=4, next=5),
+            3: make_instance(10, value=4),
+            5: HeapEntry(name='NoneType', type={}, value='None')
+        }
+
+        table = ShapeTable()
+        entries, instances = encode_heap(heap, table)
+
+        self.assertEqual(list(entries), [5])
+        self.assertEqual(len(table), 2)
+        self.assertEqual(sorted(len(rows) for _, rows in instances), [1, 2])
+        self.assertEqual(decode_heap(entries, instances, table.shapes), heap)
+
+    def test_dictionary_isnt_instance(self):
+        heap = {1: HeapEntry(name='dict', type={}, value={2: 3, 4: 5})}
+        entries, instances = encode_heap(heap, ShapeTable())
+        self.assertEqual(entries, heap)
+        self.assertEqual(instances, [])
+
+
+class ShapedTraceRecorderTests(unittest2.TestCase):
+
+    def assertStepsEqual(self, expected, actual):
+        self.assertEqual(len(expected), len(actual))
+        for expected_step, actual_step in zip(expected, actual):
+            self.assertEqual(json.loads(dumps(expected_step)),
+                             json.loads(dumps(actual_step)))
+
+    def test_shape_stored_once(self):
+        # Instances are partially initialized while `__init__` runs
+        trace = ShapedTraceRecorder().run(SCRIPT)
+        self.assertEqual(
+            [e['attributes'] for e in trace['shapes']],
+            [[], ['value'], ['next', 'value'], ['extra', 'next', 'value']]
+        )
+
+    def test_expand_steps(self):
+        expected = ControlledTraceRecorder().run(SCRIPT)
+        trace = ShapedTraceRecorder().run(SCRIPT)
+        self.assertStepsEqual(expected['steps'],
+                              list(shapes.iter_expanded_steps(trace)))
+
+    def test_stream(self):
+        expected = ControlledTraceRecorder().run(SCRIPT)
+
+        stream = StringIO()
+        dump_stream(ShapedTraceRecorder().iter_run(SCRIPT), stream)
+        stream.seek(0)
+        trace = load_stream(stream)
+
+        self.assertStepsEqual(expected['steps'], [
+            {k: v for k, v in e.items() if k not in ('refs', 'shapes')}
+            for e in shapes.iter_expanded_steps(trace)
+        ])
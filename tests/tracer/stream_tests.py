@@ -0,0 +1,58 @@
+import sys
+import unittest2
+
+import pytrace
+from pytrace.tracer import DeltaTraceRecorder
+from pytrace.tracer.delta import iter_decoded_steps
+
+
+LOOP_SCRIPT = """
+items = []
+for i in range(5):
+    items.append(i)
+    print (i)
+"""
+
+
+class TraceStreamTests(unittest2.TestCase):
+
+    def test_same_steps(self):
+        trace = pytrace.trace(LOOP_SCRIPT)
+        stream = pytrace.iter_trace(LOOP_SCRIPT)
+        steps = list(stream)
+
+        self.assertEqual(len(trace['steps']), len(steps))
+        for expected, actual in zip(trace['steps'], steps):
+            self.assertEqual(expected['lineNumber'], actual['lineNumber'])
+            self.assertEqual(expected['heap'], actual['heap'])
+
+        self.assertEqual(stream.refs, trace['refs'])
+        self.assertEqual(stream.output, trace['output'])
+        self.assertEqual(stream.script_lines, trace['scriptLines'])
+
+    def test_streamed_refs(self):
+        refs = {}
+        for step in pytrace.iter_trace(LOOP_SCRIPT):
+            refs.update(step.get('refs', {}))
+            for k, v in step.get('heap', {}).items():
+                for ref in v['value']:
+                    self.assertIn(ref, refs)
+
+    def test_early_close(self):
+        stdout = sys.stdout
+        stream = pytrace.iter_trace("while True:\n    pass")
+        for i, step in enumerate(stream):
+            self.assertIs(sys.stdout, stdout)
+            if i == 3:
+                break
+
+        self.assertIs(sys.stdout, stdout)
+
+    def test_delta_stream(self):
+        trace = pytrace.trace(LOOP_SCRIPT)
+        stream = pytrace.iter_trace(LOOP_SCRIPT,
+                                    tracer_class=DeltaTraceRecorder,
+                                    keyframe_interval=3)
+        steps = list(iter_decoded_steps(stream))
+        self.assertEqual([e['heap'] for e in trace['steps']],
+                         [e['heap'] for e in steps])